@@ -0,0 +1,191 @@
+import io
+
+import pygame
+
+
+class RotatedSprite:
+    # Every rotation of an image at steps even angle increments, made once.
+    # Drawing at an angle is then a lookup of the nearest step.
+    def __init__(self, image, steps):
+        self.steps = steps
+        self.step_angle = 360 / steps
+        self.frames = tuple(
+            pygame.transform.rotate(image, i * self.step_angle) for i in range(steps)
+        )
+
+    def index(self, angle):
+        return round(angle / self.step_angle) % self.steps
+
+    def frame(self, angle):
+        return self.frames[self.index(angle)]
+
+    def memory_bytes(self):
+        return sum(frame.get_pitch() * frame.get_height() for frame in self.frames)
+
+
+class AssetRegistry:
+    def __init__(self):
+        self.images = {}
+        self.sprite_sheets = {}
+        self.fonts = {}
+        self.rotations = {}
+        self.sounds = {}
+        self.files = {}
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self.images.clear()
+        self.sprite_sheets.clear()
+        self.fonts.clear()
+        self.rotations.clear()
+        self.sounds.clear()
+        self.files.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def add_image(self, path, image, convert_alpha=True):
+        # Takes an image decoded elsewhere (see loader.py) and converts it to
+        # the display format, which has to happen on the main thread.
+        image = image.convert_alpha() if convert_alpha else image.convert()
+        self.images[(path, None, False, convert_alpha)] = image
+        return image
+
+    def image(self, path, width=None, height=None, flip_x=False, convert_alpha=True):
+        size = (width, height) if width and height else None
+        key = (path, size, flip_x, convert_alpha)
+
+        image = self.images.get(key)
+        if image is not None:
+            self.hits += 1
+            return image
+        self.misses += 1
+
+        if size is None and not flip_x:
+            image = pygame.image.load(path)
+            image = image.convert_alpha() if convert_alpha else image.convert()
+        else:
+            image = self.image(path, convert_alpha=convert_alpha)
+            if size:
+                image = pygame.transform.scale(image, size)
+            if flip_x:
+                image = pygame.transform.flip(image, True, False)
+
+        self.images[key] = image
+        return image
+
+    def sprite_sheet(self, path, frame_width, frame_height, num_frames,
+                     scale_width=None, scale_height=None, flip_x=False):
+        size = (scale_width, scale_height) if scale_width and scale_height else None
+        key = (path, frame_width, frame_height, num_frames, size, flip_x)
+
+        frames = self.sprite_sheets.get(key)
+        if frames is not None:
+            self.hits += 1
+            return frames
+        self.misses += 1
+
+        sheet = self.image(path)
+        frames = []
+        for i in range(num_frames):
+            frame = sheet.subsurface(
+                pygame.Rect(i * frame_width, 0, frame_width, frame_height)
+            )
+            if size:
+                frame = pygame.transform.scale(frame, size)
+            if flip_x:
+                frame = pygame.transform.flip(frame, True, False)
+            frames.append(frame)
+
+        frames = tuple(frames)
+        self.sprite_sheets[key] = frames
+        return frames
+
+    def rotated(self, path, width=None, height=None, steps=72, flip_x=False):
+        size = (width, height) if width and height else None
+        key = (path, size, flip_x, steps)
+
+        rotations = self.rotations.get(key)
+        if rotations is not None:
+            self.hits += 1
+            return rotations
+        self.misses += 1
+
+        rotations = RotatedSprite(self.image(path, width, height, flip_x), steps)
+        self.rotations[key] = rotations
+        return rotations
+
+    def font(self, path, size):
+        key = (path, size)
+
+        font = self.fonts.get(key)
+        if font is not None:
+            self.hits += 1
+            return font
+        self.misses += 1
+
+        data = self.files.get(path)
+        font = pygame.font.Font(io.BytesIO(data) if data is not None else path, size)
+        self.fonts[key] = font
+        return font
+
+    def sound(self, path):
+        sound = self.sounds.get(path)
+        if sound is not None:
+            self.hits += 1
+            return sound
+        self.misses += 1
+
+        sound = self.sounds[path] = pygame.mixer.Sound(path)
+        return sound
+
+    def file(self, path):
+        data = self.files.get(path)
+        if data is not None:
+            self.hits += 1
+            return data
+        self.misses += 1
+
+        with open(path, "rb") as f:
+            data = self.files[path] = f.read()
+        return data
+
+    def surfaces(self):
+        surfaces = list(self.images.values())
+        for frames in self.sprite_sheets.values():
+            surfaces.extend(frames)
+        for rotations in self.rotations.values():
+            surfaces.extend(rotations.frames)
+        return surfaces
+
+    def memory_bytes(self):
+        counted = set()
+        total = 0
+        for surface in self.surfaces():
+            # Unscaled sprite frames are subsurfaces that share the sheet's pixels.
+            while surface.get_parent() is not None:
+                surface = surface.get_parent()
+            if id(surface) in counted:
+                continue
+            counted.add(id(surface))
+            total += surface.get_pitch() * surface.get_height()
+        return total
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "images": len(self.images),
+            "sprite_sheets": len(self.sprite_sheets),
+            "fonts": len(self.fonts),
+            "sounds": len(self.sounds),
+            "files": len(self.files),
+            "rotations": {
+                f"{path} x{steps}": rotations.memory_bytes()
+                for (path, size, flip_x, steps), rotations in self.rotations.items()
+            },
+            "memory_bytes": self.memory_bytes(),
+        }
+
+
+registry = AssetRegistry()
@@ -0,0 +1,66 @@
+import pygame
+
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT
+from functions import load_image
+
+
+def tile_image(image, width, height, alpha=False):
+    if alpha:
+        surface = pygame.Surface((width, height), pygame.SRCALPHA).convert_alpha()
+    else:
+        surface = pygame.Surface((width, height)).convert()
+    tile_width, tile_height = image.get_size()
+    for x in range(0, width, tile_width):
+        for y in range(0, height, tile_height):
+            # Tiles never overlap, so MAX just copies the pixels, alpha included.
+            surface.blit(image, (x, y), special_flags=pygame.BLEND_RGBA_MAX if alpha else 0)
+    if alpha:
+        # Foreground layers are mostly transparent, which RLE skips cheaply.
+        surface.set_alpha(255, pygame.RLEACCEL)
+    return surface
+
+
+class BackgroundLayer:
+    def __init__(self, image, factor_x=0.0, factor_y=0.0):
+        self.factor_x = factor_x
+        self.factor_y = factor_y
+        self.tile_width, self.tile_height = image.get_size()
+        # A scrolling layer is baked one tile wider (and taller) than the
+        # screen. Since the tiling repeats every tile, any scroll position is
+        # a window into this strip, and drawing it stays a single blit.
+        width = SCREEN_WIDTH + (self.tile_width if factor_x else 0)
+        height = SCREEN_HEIGHT + (self.tile_height if factor_y else 0)
+        alpha = bool(image.get_flags() & pygame.SRCALPHA)
+        self.surface = tile_image(image, width, height, alpha)
+
+    def offset(self, camera):
+        x = round(camera.render_x * self.factor_x) % self.tile_width if self.factor_x else 0
+        y = round(camera.render_y * self.factor_y) % self.tile_height if self.factor_y else 0
+        return x, y
+
+    def draw(self, screen, camera):
+        x, y = self.offset(camera)
+        screen.blit(self.surface, (0, 0), (x, y, SCREEN_WIDTH, SCREEN_HEIGHT))
+
+
+class Background:
+    def __init__(self, layers):
+        self.layers = layers
+        self.scrolling = [layer for layer in layers if layer.factor_x or layer.factor_y]
+
+    @classmethod
+    def load(cls, layers):
+        # layers is a list of (path, factor_x, factor_y), back to front. A
+        # factor of 0 keeps the layer fixed to the screen, 1 moves it with the
+        # world.
+        return cls([
+            BackgroundLayer(load_image(path, convert_alpha=i > 0), factor_x, factor_y)
+            for i, (path, factor_x, factor_y) in enumerate(layers)
+        ])
+
+    def state(self, camera):
+        return tuple(layer.offset(camera) for layer in self.scrolling)
+
+    def draw(self, screen, camera):
+        for layer in self.layers:
+            layer.draw(screen, camera)
@@ -0,0 +1,175 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from statistics import fmean
+
+worker_games = {}
+
+
+def init_worker():
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+
+def make_input(spec):
+    from inputs import RandomInput, ScriptedInput
+
+    policy = spec.get("policy", "random")
+    if policy == "random":
+        return RandomInput(spec.get("seed", 0), spec.get("hold_frames", 15),
+                           spec.get("press_chance", 0.4))
+    if policy == "scripted":
+        return ScriptedInput(spec["frames"], spec.get("loop", True))
+    if policy == "idle":
+        return ScriptedInput([])
+    raise ValueError(f"Unknown input policy {policy!r}")
+
+
+def worker_game(level, vectorize_movers):
+    # Building a GameLoop loads every asset, which costs far more than a short
+    # episode. Each worker keeps one per level and restarts it between episodes.
+    from game_loop import GameLoop
+    from level import create_level
+    from level_format import level_loader
+
+    key = (level, vectorize_movers)
+    game = worker_games.get(key)
+    if game is None:
+        game = worker_games[key] = GameLoop(
+            headless=True, vectorize_movers=vectorize_movers,
+            level_factory=level_loader(level) if level else create_level,
+        )
+    else:
+        game.restart_game()
+    return game
+
+
+def run_episode(spec):
+    start = time.perf_counter()
+    game = worker_game(spec.get("level"), spec.get("vectorize_movers"))
+    game.input_source = make_input(spec)
+    game.game_started = True
+
+    max_frames = spec.get("max_frames", 3600)
+    frames = 0
+    while frames < max_frames and not (game.game_over or game.game_won):
+        game.update()
+        frames += 1
+
+    player = game.player
+    if game.game_won:
+        outcome = "win"
+    elif game.game_over:
+        outcome = "death"
+    else:
+        outcome = "timeout"
+    return {
+        "episode": spec.get("episode"),
+        "seed": spec.get("seed"),
+        "outcome": outcome,
+        "score": player.score,
+        "frames": frames,
+        "health": player.health,
+        "ammo": player.ammo,
+        "x": player.rect.x,
+        "elapsed_s": time.perf_counter() - start,
+        "worker": os.getpid(),
+    }
+
+
+def run_batch(specs, workers=None):
+    # Yields each episode's result as soon as it finishes, in completion order.
+    specs = list(specs)
+    if workers == 1:
+        # Runs in this process, so the caller gets its environment back after.
+        saved = dict(os.environ)
+        init_worker()
+        try:
+            for spec in specs:
+                yield run_episode(spec)
+        finally:
+            os.environ.clear()
+            os.environ.update(saved)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+        futures = [pool.submit(run_episode, spec) for spec in specs]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def summarize_episodes(results, elapsed):
+    outcomes = {"win": 0, "death": 0, "timeout": 0}
+    for result in results:
+        outcomes[result["outcome"]] += 1
+    frames = sum(result["frames"] for result in results)
+    return {
+        "episodes": len(results),
+        "outcomes": outcomes,
+        "mean_score": fmean(result["score"] for result in results) if results else 0,
+        "mean_frames": frames / len(results) if results else 0,
+        "elapsed_s": elapsed,
+        "episodes_per_s": len(results) / elapsed if elapsed else 0,
+        "frames_per_s": frames / elapsed if elapsed else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run many headless Wizard Frog episodes")
+    parser.add_argument("--episodes", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes, defaults to the number of CPUs")
+    parser.add_argument("--max-frames", type=int, default=3600)
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the first episode, the rest count up from it")
+    parser.add_argument("--policy", choices=("random", "idle"), default="random")
+    parser.add_argument("--hold-frames", type=int, default=15)
+    parser.add_argument("--press-chance", type=float, default=0.4)
+    parser.add_argument("--level", help="load the level from a .json or binary level file")
+    parser.add_argument("--scalar-movers", action="store_true")
+    parser.add_argument("--output", help="write one JSON line per episode to this file")
+    args = parser.parse_args()
+
+    specs = [
+        {
+            "episode": i,
+            "seed": args.seed + i,
+            "policy": args.policy,
+            "hold_frames": args.hold_frames,
+            "press_chance": args.press_chance,
+            "max_frames": args.max_frames,
+            "level": args.level,
+            "vectorize_movers": False if args.scalar_movers else None,
+        }
+        for i in range(args.episodes)
+    ]
+
+    output = open(args.output, "w") if args.output else None
+    results = []
+    start = time.perf_counter()
+    try:
+        for result in run_batch(specs, args.workers):
+            results.append(result)
+            print(f"episode {result['episode']:>5}  {result['outcome']:<7}  "
+                  f"score {result['score']:>3}  frames {result['frames']:>6}  "
+                  f"{result['elapsed_s']:.2f}s")
+            if output is not None:
+                output.write(json.dumps(result) + "\n")
+                output.flush()
+    finally:
+        if output is not None:
+            output.close()
+
+    summary = summarize_episodes(results, time.perf_counter() - start)
+    outcomes = summary["outcomes"]
+    print(f"{summary['episodes']} episodes in {summary['elapsed_s']:.2f}s "
+          f"({summary['episodes_per_s']:.1f} episodes/s, "
+          f"{summary['frames_per_s']:.0f} frames/s): "
+          f"{outcomes['win']} wins, {outcomes['death']} deaths, "
+          f"{outcomes['timeout']} timeouts, mean score {summary['mean_score']:.2f}, "
+          f"mean frames {summary['mean_frames']:.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import argparse
+import json
+import platform
+import random
+import time
+from statistics import fmean
+
+from game_loop import GameLoop
+from inputs import RandomInput
+from level import create_synthetic_level
+from movers import MoverEngine
+
+PLAYER_CHECKS = (
+    "check_collision_x",
+    "check_collision_y",
+    "check_saw_collision",
+    "check_enemy_collision",
+    "check_heart_item_collision",
+    "check_projectile_collisions",
+    "check_ammo_item_collision",
+)
+
+
+def percentile(sorted_values, fraction):
+    index = round(fraction * (len(sorted_values) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples):
+    if not samples:
+        return {"calls": 0}
+    values = sorted(samples)
+    return {
+        "calls": len(values),
+        "mean_ms": fmean(values) * 1000,
+        "p50_ms": percentile(values, 0.50) * 1000,
+        "p95_ms": percentile(values, 0.95) * 1000,
+        "p99_ms": percentile(values, 0.99) * 1000,
+    }
+
+
+class PhaseTimer:
+    def __init__(self):
+        self.samples = {}
+
+    def wrap(self, name, function):
+        samples = self.samples.setdefault(name, [])
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            result = function(*args, **kwargs)
+            samples.append(time.perf_counter() - start)
+            return result
+
+        return timed
+
+    def instrument(self, obj, name, label=None):
+        setattr(obj, name, self.wrap(label or name, getattr(obj, name)))
+
+    def reset(self):
+        for samples in self.samples.values():
+            samples.clear()
+
+    def summary(self):
+        return {name: summarize(samples) for name, samples in self.samples.items()}
+
+
+def respawn(game, rng):
+    # Keeps the player alive and moving around the level so every frame
+    # measures real gameplay instead of the game over screen.
+    platform = game.platforms[rng.randrange(len(game.platforms))]
+    player = game.player
+    player.rect.midbottom = platform.rect.midtop
+    player.x = player.rect.x
+    player.y = player.rect.y
+    player.vel_y = 0
+    player.health = 100
+    player.player_dead = False
+    game.game_over = False
+    game.game_won = False
+    game.camera.update(player)
+
+
+def benchmark_level(count, frames=300, warmup=30, respawn_every=300, seed=0,
+                    vectorize_movers=None):
+    build_times = []
+
+    def build_level():
+        start = time.perf_counter()
+        level = create_synthetic_level(count, seed)
+        build_times.append(time.perf_counter() - start)
+        return level
+
+    game = GameLoop(headless=True, input_source=RandomInput(seed),
+                    level_factory=build_level, vectorize_movers=vectorize_movers)
+    game.game_started = True
+
+    timer = PhaseTimer()
+    timer.instrument(game, "update", "GameLoop.update")
+    timer.instrument(game, "draw", "GameLoop.draw")
+    for name in PLAYER_CHECKS:
+        timer.instrument(game.player, name, "Player." + name)
+
+    rng = random.Random(seed)
+    for frame in range(warmup + frames):
+        if frame == warmup:
+            timer.reset()
+        if game.game_over or game.game_won or frame % respawn_every == 0:
+            respawn(game, rng)
+        game.update()
+        game.draw()
+
+    return {
+        "entities": (len(game.platforms) + len(game.saws) + len(game.enemies) +
+                     len(game.heart_items) + len(game.ammo_items)),
+        "build_level_s": build_times[0],
+        "frames": frames,
+        "phases": timer.summary(),
+    }
+
+
+def benchmark_movers(count, frames=300, seed=0):
+    # Steps every moving platform and enemy each frame, once through their
+    # update() methods and once through MoverEngine, with no sleeping.
+    platforms, _, _, enemies, _ = create_synthetic_level(count, seed)
+    movers = [platform for platform in platforms
+              if platform.type in ("moving_vertical", "moving_horizontal")] + enemies
+
+    start = time.perf_counter()
+    for _ in range(frames):
+        for mover in movers:
+            mover.update()
+    objects = (time.perf_counter() - start) / frames
+
+    engine = MoverEngine()
+    for mover in movers:
+        engine.add(mover, getattr(mover, "type", "") != "moving_vertical")
+    start = time.perf_counter()
+    for _ in range(frames):
+        engine.step()
+        engine.moved_cells()
+    arrays = (time.perf_counter() - start) / frames
+
+    return {
+        "movers": len(movers),
+        "update_ms": objects * 1000,
+        "engine_ms": arrays * 1000,
+        "speedup": objects / arrays,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Wizard Frog engine benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000, 100000],
+                        help="number of platforms, saws, enemies and items per level")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--scalar-movers", action="store_true",
+                        help="update movers one object at a time even when NumPy is available")
+    parser.add_argument("--movers", type=int, nargs="*", default=[],
+                        help="also compare update() against MoverEngine at these level sizes")
+    args = parser.parse_args()
+
+    results = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "frames": args.frames,
+        "levels": {},
+    }
+    for count in args.sizes:
+        result = benchmark_level(count, args.frames, args.warmup, seed=args.seed,
+                                 vectorize_movers=False if args.scalar_movers else None)
+        results["levels"][str(count)] = result
+        print(f"{count} per type ({result['entities']} entities), "
+              f"level built in {result['build_level_s'] * 1000:.1f} ms")
+        for name, stats in result["phases"].items():
+            if stats["calls"]:
+                print(f"  {name:<36} mean {stats['mean_ms']:8.3f} ms  "
+                      f"p95 {stats['p95_ms']:8.3f} ms  p99 {stats['p99_ms']:8.3f} ms")
+
+    results["movers"] = {}
+    for count in args.movers:
+        result = benchmark_movers(count, args.frames, args.seed)
+        results["movers"][str(count)] = result
+        print(f"{result['movers']} movers: update() {result['update_ms']:.3f} ms, "
+              f"MoverEngine {result['engine_ms']:.3f} ms ({result['speedup']:.1f}x)")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,10 +5,32 @@ class Camera:
     def __init__(self):
         self.offset_x = 0
         self.offset_y = 0
+        self.prev_offset_x = 0
+        self.prev_offset_y = 0
+        self.render_x = 0
+        self.render_y = 0
+        self.alpha = 1.0
 
-    def apply(self, rect):
-        return pygame.Rect(rect.x - self.offset_x, rect.y - self.offset_y, rect.width, rect.height)
+    def apply(self, rect, motion_x=0, motion_y=0):
+        # motion is how far the object moved during the last simulation step,
+        # so it can be drawn part way between its previous and current position.
+        back = 1.0 - self.alpha
+        return pygame.Rect(rect.x - round(motion_x * back) - self.render_x,
+                           rect.y - round(motion_y * back) - self.render_y,
+                           rect.width, rect.height)
+
+    def set_alpha(self, alpha):
+        self.alpha = alpha
+        self.render_x = round(self.prev_offset_x + (self.offset_x - self.prev_offset_x) * alpha)
+        self.render_y = round(self.prev_offset_y + (self.offset_y - self.prev_offset_y) * alpha)
 
     def update(self, target):
+        self.prev_offset_x = self.offset_x
+        self.prev_offset_y = self.offset_y
         self.offset_x = target.rect.centerx - SCREEN_WIDTH // 2
-        self.offset_y = target.rect.centery - SCREEN_HEIGHT // 2
\ No newline at end of file
+        self.offset_y = target.rect.centery - SCREEN_HEIGHT // 2
+        self.set_alpha(self.alpha)
+
+    def visible_rect(self, margin=0):
+        return pygame.Rect(self.offset_x - margin, self.offset_y - margin,
+                           SCREEN_WIDTH + margin * 2, SCREEN_HEIGHT + margin * 2)
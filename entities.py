@@ -1,11 +1,13 @@
 import pygame
-from functions import load_image, load_sprite_sheet, update_animation_frame
+from functions import (load_image, load_sprite_sheet, update_animation_frame,
+                       advance_animation_frame, advance_oscillator)
 from constants import SCREEN_WIDTH
 
 class Projectile:
     def __init__(self, x, y, direction, image_path="Assets/Ammo.png"):
         self.x = x
         self.y = y
+        self.prev_x = x
         self.width = 15
         self.height = 8
         self.rect = pygame.Rect(x, y, self.width, self.height)
@@ -14,13 +16,22 @@ class Projectile:
         self.color = (255, 255, 0)
         self.image = load_image(image_path, self.width, self.height)
 
+    def reset(self, x, y, direction):
+        self.x = x
+        self.prev_x = x
+        self.y = y
+        self.rect.x = x
+        self.rect.y = y
+        self.direction = direction
+
     def update(self):
+        self.prev_x = self.x
         self.x += self.speed * self.direction
         self.rect.x = self.x
 
     def draw(self, screen, camera):
         sprite_rect = pygame.Rect(self.x, self.y, self.width, self.height)
-        draw_rect = camera.apply(sprite_rect)
+        draw_rect = camera.apply(sprite_rect, self.x - self.prev_x)
         screen.blit(self.image, draw_rect)
 
     def is_off_screen(self, camera):
@@ -30,6 +41,51 @@ class Projectile:
         return distance > SCREEN_WIDTH * 2
 
 
+class ProjectilePool:
+    def __init__(self, capacity=64, image_path="Assets/Ammo.png"):
+        self.capacity = capacity
+        self.slots = [Projectile(0, 0, 1, image_path) for _ in range(capacity)]
+        self.count = 0
+        self.next_recycled = 0
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        slots = self.slots
+        for i in range(self.count):
+            yield slots[i]
+
+    def spawn(self, x, y, direction):
+        if self.count < self.capacity:
+            projectile = self.slots[self.count]
+            self.count += 1
+        else:
+            # Pool is full, so the live slot that has gone longest without
+            # being recycled is reused for the new shot.
+            projectile = self.slots[self.next_recycled]
+            self.next_recycled = (self.next_recycled + 1) % self.capacity
+        projectile.reset(x, y, direction)
+        return projectile
+
+    def retire(self, index):
+        self.count -= 1
+        slots = self.slots
+        slots[index], slots[self.count] = slots[self.count], slots[index]
+
+    def clear(self):
+        self.count = 0
+        self.next_recycled = 0
+
+    def update(self, camera):
+        slots = self.slots
+        for i in range(self.count - 1, -1, -1):
+            projectile = slots[i]
+            projectile.update()
+            if projectile.is_off_screen(camera):
+                self.retire(i)
+
+
 class Saw:
     def __init__(self, x, y, sprite_sheet_path="Assets/Saw.png"):
         self.x = x
@@ -50,6 +106,7 @@ class Saw:
         self.current_frame = 0
         self.animation_speed = 0.5
         self.frame_counter = 0
+        self.last_tick = -1
 
         self.load_sprite_sheet(sprite_sheet_path)
 
@@ -72,6 +129,22 @@ class Saw:
                 len(self.frames)
             )
 
+    def fast_forward(self, steps):
+        if self.frames:
+            self.current_frame, self.frame_counter = advance_animation_frame(
+                self.current_frame,
+                self.frame_counter,
+                self.animation_speed,
+                len(self.frames),
+                steps
+            )
+
+    def save_state(self):
+        return self.current_frame, self.frame_counter, self.last_tick
+
+    def load_state(self, state):
+        self.current_frame, self.frame_counter, self.last_tick = state
+
     def draw(self, screen, camera):
         sprite_rect = pygame.Rect(self.x, self.y, self.width, self.height)
         draw_rect = camera.apply(sprite_rect)
@@ -79,7 +152,11 @@ class Saw:
 
 
 class Enemy:
+    mover_fields = ("prev_x", "prev_y", "vel_x", "vel_y", "move_speed", "move_range",
+                    "move_direction", "current_frame", "frame_counter", "animation_speed")
+
     def __init__(self, x, y, sprite_sheet_path="Assets/Enemy.png"):
+        self.movers = None
         self.x = x
         self.y = y
         self.width = 100
@@ -94,6 +171,8 @@ class Enemy:
         )
         self.original_x = x
         self.original_y = y
+        self.prev_x = self.rect.x
+        self.prev_y = self.rect.y
 
         self.move_speed = 2
         self.move_range = 100
@@ -108,6 +187,7 @@ class Enemy:
         self.frame_counter = 0
 
         self.health = 60
+        self.last_tick = -1
 
         self.load_sprite_sheet(sprite_sheet_path)
 
@@ -122,6 +202,8 @@ class Enemy:
         )
 
     def update(self):
+        self.prev_x = self.rect.x
+        self.prev_y = self.rect.y
         self.vel_x = self.vel_y = 0
         self.vel_x = self.move_speed * self.move_direction
         self.rect.x += self.vel_x
@@ -135,25 +217,63 @@ class Enemy:
                 len(self.frames)
             )
 
+    def fast_forward(self, steps):
+        offset, self.move_direction = advance_oscillator(
+            self.rect.x - self.original_x,
+            self.move_direction,
+            self.move_speed,
+            self.move_range,
+            steps
+        )
+        self.rect.x = self.original_x + offset
+        self.prev_x = self.rect.x
+        if self.frames:
+            self.current_frame, self.frame_counter = advance_animation_frame(
+                self.current_frame,
+                self.frame_counter,
+                self.animation_speed,
+                len(self.frames),
+                steps
+            )
+
+    def save_state(self):
+        return (self.rect.x, self.prev_x, self.prev_y, self.vel_x, self.vel_y,
+                self.move_direction, self.current_frame, self.frame_counter, self.health,
+                self.last_tick)
+
+    def load_state(self, state):
+        (self.rect.x, self.prev_x, self.prev_y, self.vel_x, self.vel_y, self.move_direction,
+         self.current_frame, self.frame_counter, self.health, self.last_tick) = state
+        if self.movers is not None:
+            self.movers.store(self)
+
     def draw(self, screen, camera):
         sprite_rect = pygame.Rect(self.rect.x, self.rect.y, self.width, self.height)
-        draw_rect = camera.apply(sprite_rect)
+        draw_rect = camera.apply(sprite_rect, self.rect.x - self.prev_x,
+                                 self.rect.y - self.prev_y)
         screen.blit(self.frames[self.current_frame], draw_rect)
 
 
 class Platform:
+    mover_fields = ("prev_x", "prev_y", "vel_x", "vel_y", "move_speed", "move_range",
+                    "move_direction")
+
     def __init__(self, x, y, width, height, platform_type="normal",
                  image_path="Assets/Platform.png"):
+        self.movers = None
         self.rect = pygame.Rect(x, y, width, height)
         self.type = platform_type
         self.original_x = x
         self.original_y = y
+        self.prev_x = x
+        self.prev_y = y
 
         self.move_speed = 2
         self.move_range = 100
         self.move_direction = 1
         self.vel_x = 0
         self.vel_y = 0
+        self.last_tick = -1
         self.image = None
         self.load_image(image_path)
 
@@ -161,6 +281,8 @@ class Platform:
         self.image = load_image(path, self.rect.width, self.rect.height)
 
     def update(self):
+        self.prev_x = self.rect.x
+        self.prev_y = self.rect.y
         self.vel_x = self.vel_y = 0
 
         if self.type == "moving_vertical":
@@ -175,6 +297,40 @@ class Platform:
             if abs(self.rect.x - self.original_x) > self.move_range:
                 self.move_direction *= -1
 
+    def fast_forward(self, steps):
+        if self.type == "moving_vertical":
+            offset, self.move_direction = advance_oscillator(
+                self.rect.y - self.original_y,
+                self.move_direction,
+                self.move_speed,
+                self.move_range,
+                steps
+            )
+            self.rect.y = self.original_y + offset
+            self.prev_y = self.rect.y
+
+        elif self.type == "moving_horizontal":
+            offset, self.move_direction = advance_oscillator(
+                self.rect.x - self.original_x,
+                self.move_direction,
+                self.move_speed,
+                self.move_range,
+                steps
+            )
+            self.rect.x = self.original_x + offset
+            self.prev_x = self.rect.x
+
+    def save_state(self):
+        return (self.rect.x, self.rect.y, self.prev_x, self.prev_y, self.vel_x, self.vel_y,
+                self.move_direction, self.last_tick)
+
+    def load_state(self, state):
+        (self.rect.x, self.rect.y, self.prev_x, self.prev_y, self.vel_x, self.vel_y,
+         self.move_direction, self.last_tick) = state
+        if self.movers is not None:
+            self.movers.store(self)
+
     def draw(self, screen, camera):
-        draw_rect = camera.apply(self.rect)
+        draw_rect = camera.apply(self.rect, self.rect.x - self.prev_x,
+                                 self.rect.y - self.prev_y)
         screen.blit(self.image, draw_rect)
\ No newline at end of file
@@ -0,0 +1,249 @@
+import heapq
+import multiprocessing
+import os
+from multiprocessing.shared_memory import SharedMemory
+
+import pygame
+
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT
+from inputs import KeyState
+from movers import np
+
+MOVES = ((), (pygame.K_LEFT,), (pygame.K_RIGHT,))
+ACTIONS = tuple(
+    move + jump + shoot
+    for move in MOVES
+    for jump in ((), (pygame.K_SPACE,))
+    for shoot in ((), (pygame.K_x,))
+)
+ACTION_STATES = tuple(KeyState(keys) for keys in ACTIONS)
+
+PLAYER_FEATURES = 8
+ENTITY_FEATURES = 4
+
+
+def observation_spec(observation="features", nearby=8):
+    if observation == "features":
+        return (PLAYER_FEATURES + 3 * nearby * ENTITY_FEATURES,), "float32"
+    if observation == "pixels":
+        return (SCREEN_HEIGHT, SCREEN_WIDTH, 3), "uint8"
+    raise ValueError(f"Unknown observation type {observation!r}")
+
+
+class WizardFrogEnv:
+    # Drives GameLoop one simulation step at a time without the event loop,
+    # the keyboard or the frame clock, so it runs as fast as update() allows.
+    # Actions index ACTIONS: no move, left or right, each with or without jump
+    # and shoot. The reward is the score gained, plus win_reward or
+    # death_reward when the episode ends.
+    def __init__(self, observation="features", nearby=8, sight=(SCREEN_WIDTH, SCREEN_HEIGHT),
+                 max_steps=3600, frame_skip=1, level=None, vectorize_movers=None,
+                 win_reward=10.0, death_reward=-10.0):
+        if np is None:
+            raise ImportError("WizardFrogEnv requires NumPy")
+        from game_loop import GameLoop
+        from level import create_level
+        from level_format import level_loader
+
+        self.observation_type = observation
+        self.observation_shape, dtype = observation_spec(observation, nearby)
+        self.nearby = nearby
+        self.sight = sight
+        self.max_steps = max_steps
+        self.frame_skip = frame_skip
+        self.win_reward = win_reward
+        self.death_reward = death_reward
+        self.action_count = len(ACTIONS)
+
+        self.game = GameLoop(headless=True, vectorize_movers=vectorize_movers,
+                             level_factory=level_loader(level) if level else create_level)
+        self.game.input_source = self
+        self.keys = ACTION_STATES[0]
+        self.features = np.zeros(self.observation_shape, dtype)
+        self.steps = 0
+        self.fresh = True
+
+    def get_pressed(self):
+        return self.keys
+
+    def reset(self, seed=None):
+        # The game has no randomness of its own; seed is accepted so the
+        # environment can be used wherever a seeded reset is expected.
+        self.check_released()
+        if not self.fresh:
+            self.game.restart_game()
+        self.fresh = False
+        self.game.game_started = True
+        self.steps = 0
+        return self.observe(), self.info()
+
+    def step(self, action):
+        self.check_released()
+        game = self.game
+        player = game.player
+        self.keys = ACTION_STATES[action]
+        score = player.score
+        for _ in range(self.frame_skip):
+            game.update()
+            if game.game_over or game.game_won:
+                break
+        self.steps += 1
+
+        reward = float(game.player.score - score)
+        terminated = game.game_over or game.game_won
+        if game.game_won:
+            reward += self.win_reward
+        elif game.game_over:
+            reward += self.death_reward
+        truncated = not terminated and self.steps >= self.max_steps
+        return self.observe(), reward, terminated, truncated, self.info()
+
+    def info(self):
+        player = self.game.player
+        return {"score": player.score, "health": player.health, "steps": self.steps,
+                "won": self.game.game_won}
+
+    def observe(self):
+        if self.observation_type == "pixels":
+            return self.pixels()
+        return self.feature_vector()
+
+    def check_released(self):
+        # Runs before the game is touched, so a step refused here can simply
+        # be retried once the old observation is gone.
+        if self.observation_type == "pixels" and self.game.screen.get_locked():
+            raise RuntimeError("The previous pixel observation is still in use; "
+                               "copy it before stepping again")
+
+    def pixels(self):
+        # A view of the screen's own memory as (height, width, RGB), not a
+        # copy. It holds a lock on the screen, so it has to be released (or
+        # copied) before the next step can draw.
+        screen = self.game.screen
+        self.game.render()
+        return pygame.surfarray.pixels3d(screen).transpose(1, 0, 2)
+
+    def feature_vector(self):
+        # The player's rect, velocity, health, ammo, score and ground contact,
+        # then the nearest platforms, saws and enemies within a sight sized
+        # area around the player, as rects relative to it, nearest first and
+        # zero padded. The same array is refilled every step.
+        game = self.game
+        player = game.player
+        rect = player.rect
+        out = self.features
+        out[:PLAYER_FEATURES] = (rect.x, rect.y, player.vel_x, player.vel_y,
+                                 player.health, player.ammo, player.score, player.on_ground)
+
+        x, y = rect.center
+
+        def distance(entity):
+            other = entity.rect
+            return (other.centerx - x) ** 2 + (other.centery - y) ** 2
+
+        region = rect.inflate(*self.sight)
+        nearby = self.nearby
+        offset = PLAYER_FEATURES
+        index = game.index
+        # Candidates come from whole cells around the region, so every mover
+        # that could be among them is synced from the arrays first.
+        margin = (index.platforms.cell_size + index.max_reach) * 2
+        sight = [region.inflate(margin, margin)]
+        index.sync_movers(sight, sight)
+        for grid in (index.platforms, index.saws, index.enemies):
+            values = []
+            for entity in heapq.nsmallest(nearby, grid.query(region), key=distance):
+                other = entity.rect
+                values += (other.x - x, other.y - y, other.width, other.height)
+            end = offset + nearby * ENTITY_FEATURES
+            out[offset:offset + len(values)] = values
+            out[offset + len(values):end] = 0
+            offset = end
+        return out
+
+
+def vector_worker(pipe, index, memory_name, shape, dtype, env_kwargs):
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+    env = WizardFrogEnv(**env_kwargs)
+    memory = SharedMemory(name=memory_name)
+    slot = np.ndarray(shape, dtype, buffer=memory.buf)[index]
+    try:
+        while True:
+            command, data = pipe.recv()
+            if command == "reset":
+                observation, info = env.reset(data)
+                slot[...] = observation
+                pipe.send(info)
+            elif command == "step":
+                observation, reward, terminated, truncated, info = env.step(data)
+                if terminated or truncated:
+                    # Finished environments restart straight away, so every
+                    # slot always holds a live observation.
+                    observation = None
+                    observation, _ = env.reset()
+                slot[...] = observation
+                pipe.send((reward, terminated, truncated, info))
+            else:
+                break
+            observation = None
+    finally:
+        del slot
+        memory.close()
+
+
+class VectorEnv:
+    # Steps num_envs environments in lockstep, one worker process each.
+    # Observations are written by the workers into one shared memory block;
+    # reset() and step() return a view of it, overwritten by the next call.
+    def __init__(self, num_envs, **env_kwargs):
+        if np is None:
+            raise ImportError("VectorEnv requires NumPy")
+        shape, dtype = observation_spec(env_kwargs.get("observation", "features"),
+                                        env_kwargs.get("nearby", 8))
+        shape = (num_envs,) + shape
+        self.num_envs = num_envs
+        self.action_count = len(ACTIONS)
+        self.memory = SharedMemory(create=True, size=int(np.prod(shape)) * np.dtype(dtype).itemsize)
+        self.observations = np.ndarray(shape, dtype, buffer=self.memory.buf)
+
+        # Spawned, not forked: a forked child inherits the parent's SDL state,
+        # which can hang it if SDL has started threads of its own.
+        context = multiprocessing.get_context("spawn")
+        self.pipes = []
+        self.processes = []
+        for i in range(num_envs):
+            pipe, worker_pipe = context.Pipe()
+            process = context.Process(target=vector_worker, daemon=True,
+                                      args=(worker_pipe, i, self.memory.name, shape, dtype,
+                                            env_kwargs))
+            process.start()
+            worker_pipe.close()
+            self.pipes.append(pipe)
+            self.processes.append(process)
+
+    def reset(self, seed=None):
+        for i, pipe in enumerate(self.pipes):
+            pipe.send(("reset", None if seed is None else seed + i))
+        infos = [pipe.recv() for pipe in self.pipes]
+        return self.observations, infos
+
+    def step(self, actions):
+        for pipe, action in zip(self.pipes, actions):
+            pipe.send(("step", int(action)))
+        results = [pipe.recv() for pipe in self.pipes]
+        rewards = np.array([result[0] for result in results], np.float32)
+        terminated = np.array([result[1] for result in results], bool)
+        truncated = np.array([result[2] for result in results], bool)
+        return self.observations, rewards, terminated, truncated, [result[3] for result in results]
+
+    def close(self):
+        for pipe in self.pipes:
+            pipe.send(("close", None))
+        for process in self.processes:
+            process.join()
+        for pipe in self.pipes:
+            pipe.close()
+        del self.observations
+        self.memory.close()
+        self.memory.unlink()
@@ -1,34 +1,20 @@
 import pygame
 
-def load_image(path, width=None, height=None, convert_alpha=True):
-    if convert_alpha:
-        image = pygame.image.load(path).convert_alpha()
-    else:
-        image = pygame.image.load(path).convert()
-
-    if width and height:
-        image = pygame.transform.scale(image, (width, height))
+from assets import registry
 
-    return image
+def load_image(path, width=None, height=None, convert_alpha=True, flip_x=False):
+    return registry.image(path, width, height, flip_x, convert_alpha)
 
 def load_sprite_sheet(path, frame_width, frame_height, num_frames,
-                      scale_width=None, scale_height=None):
-    frames = []
-
-    sprite_sheet = pygame.image.load(path).convert_alpha()
-
-    for i in range(num_frames):
-        frame_x = i * frame_width
-        frame = sprite_sheet.subsurface(
-            pygame.Rect(frame_x, 0, frame_width, frame_height)
-        )
-
-        if scale_width and scale_height:
-            frame = pygame.transform.scale(frame, (scale_width, scale_height))
+                      scale_width=None, scale_height=None, flip_x=False):
+    return registry.sprite_sheet(path, frame_width, frame_height, num_frames,
+                                 scale_width, scale_height, flip_x)
 
-        frames.append(frame)
+def load_rotated(path, width=None, height=None, steps=72, flip_x=False):
+    return registry.rotated(path, width, height, steps, flip_x)
 
-    return frames
+def load_font(path, size):
+    return registry.font(path, size)
 
 def create_centered_rect(x, y, sprite_width, sprite_height,
                          hitbox_width, hitbox_height):
@@ -45,6 +31,76 @@ def update_animation_frame(current_frame, frame_counter, animation_speed, num_fr
     return current_frame, frame_counter
 
 def load_sound(path, volume=1.0):
-    sound = pygame.mixer.Sound(path)
+    sound = registry.sound(path)
     sound.set_volume(volume)
-    return sound
\ No newline at end of file
+    return sound
+
+def advance_animation_frame(current_frame, frame_counter, animation_speed, num_frames, steps):
+    if animation_speed <= 0 or steps <= 0:
+        return current_frame, frame_counter
+
+    while steps > 0:
+        steps -= 1
+        frame_counter += animation_speed
+        if frame_counter >= 1:
+            frame_counter = 0
+            current_frame = (current_frame + 1) % num_frames
+            break
+    else:
+        return current_frame, frame_counter
+
+    # From a reset counter every frame takes the same number of steps.
+    steps_per_frame = 0
+    counter = 0
+    while counter < 1:
+        counter += animation_speed
+        steps_per_frame += 1
+
+    advances, steps = divmod(steps, steps_per_frame)
+    current_frame = (current_frame + advances) % num_frames
+    for _ in range(steps):
+        frame_counter += animation_speed
+    return current_frame, frame_counter
+
+
+def advance_oscillator(offset, direction, speed, move_range, steps):
+    # Closed form of the movement in Platform.update and Enemy.update: move by
+    # speed * direction, then flip direction once further than move_range from
+    # the origin. offset is the current distance from the origin.
+    if speed == 0:
+        if abs(offset) > move_range and steps % 2 == 1:
+            direction *= -1
+        return offset, direction
+
+    while steps > 0:
+        top = offset + speed * ((move_range - offset) // speed + 1)
+        bottom = offset - speed * ((offset + move_range) // speed + 1)
+        on_cycle = (bottom <= offset <= top and
+                    not (offset == top and direction > 0) and
+                    not (offset == bottom and direction < 0))
+        if on_cycle:
+            break
+        # Only reachable when an entity starts outside its own range; step it
+        # until it joins the cycle. If both this position and the next one are
+        # out of range it bounces between them forever.
+        if abs(offset) > move_range and abs(offset + speed * direction) > move_range:
+            steps %= 2
+            if steps == 0:
+                return offset, direction
+        offset += speed * direction
+        if abs(offset) > move_range:
+            direction *= -1
+        steps -= 1
+    else:
+        return offset, direction
+
+    length = (top - bottom) // speed
+    if direction > 0:
+        phase = (offset - bottom) // speed
+    else:
+        phase = length + (top - offset) // speed
+
+    phase = (phase + steps) % (2 * length)
+    if phase < length:
+        return bottom + phase * speed, 1
+    return top - (phase - length) * speed, -1
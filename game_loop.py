@@ -1,58 +1,197 @@
+import io
+import os
+from time import perf_counter
+
 import pygame
 
+from background import Background
 from camera import Camera
 from constants import SCREEN_WIDTH, SCREEN_HEIGHT, FPS
+from assets import registry
+from functions import load_image, load_font
+from inputs import KeyboardInput
 from level import create_level
+from loader import AssetLoader
 from player import Player
-from ui import HealthBar, AmmoDisplay, FrogDisplay, ScoreDisplay
+from profiler import FrameProfiler
+from renderer import DirtyRectRenderer
+from savestate import GameState, save_game, load_game
+from scheduler import ActivityScheduler
+from snapshot import WorldSnapshot
+from sounds import sound_bank
+from spatial import LevelIndex
+from ui import (HealthBar, AmmoDisplay, FrogDisplay, ScoreDisplay, HudLayer,
+                OverlayScreen, dim_overlay)
 
 pygame.init()
-pygame.mixer.init()
-pygame.mixer.set_num_channels(64)
+
+QUICKSAVE_PATH = "quicksave.wfs"
+
+
+def use_dummy_drivers():
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+    pygame.display.quit()
+    pygame.display.init()
+    pygame.mixer.quit()
 
 
 class GameLoop:
     def __init__(self, background_path="Assets/Background.png",
-                 damage_background_path="Assets/Background2.png"):
+                 damage_background_path="Assets/Background2.png",
+                 headless=False, input_source=None, max_render_fps=FPS,
+                 level_factory=create_level, profile=False, level_stream=None,
+                 vectorize_movers=None, dirty_rects=False, background_layers=None,
+                 recorder=None, instant_restart=True):
+        self.started_at = perf_counter()
+        self.time_to_first_frame = None
+        self.headless = headless
+        self.vectorize_movers = vectorize_movers
+        self.level_factory = level_factory
+        self.level_stream = level_stream
+        self.streamer = None
+        if headless:
+            use_dummy_drivers()
+        pygame.mixer.init()
+        sound_bank.open()
+
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        self.canvas = self.screen
+        self.renderer = DirtyRectRenderer() if dirty_rects else None
         pygame.display.set_caption("")
         self.clock = pygame.time.Clock()
+        self.max_render_fps = max_render_fps
+        self.timestep = 1 / FPS
+        self.max_catchup_steps = 5
+        self.input_source = input_source or KeyboardInput()
+        self.recorder = recorder
+        if recorder is not None:
+            recorder.source = self.input_source
+            self.input_source = recorder
+        self.profiler = FrameProfiler()
+        if profile:
+            self.profiler.toggle()
         self.running = True
         self.game_started = False
         self.game_over = False
         self.game_won = False
 
-        self.platforms, self.saws, self.heart_items, self.enemies, self.ammo_items = \
-            create_level()
+        self.loader = AssetLoader()
+        self.load_assets()
+
+        self.load_level()
 
         self.player = Player(200, 300)
         self.player.set_game_loop(self)
         self.camera = Camera()
-
-        self.background = pygame.image.load(background_path).convert()
-        self.damage_background = pygame.image.load(damage_background_path).convert()
-
-        self.damage_background = pygame.transform.scale(
-            self.damage_background, (SCREEN_WIDTH, SCREEN_HEIGHT)
+        self.scheduler = ActivityScheduler()
+        self.update_streaming()
+        # Streamed levels change as the camera moves, so they are rebuilt.
+        self.snapshot = None
+        if instant_restart and level_stream is None:
+            self.snapshot = WorldSnapshot(self)
+            self.scheduler.track()
+
+        if background_layers is None:
+            background_layers = [(background_path, 0, 0)]
+        self.background = Background.load(background_layers)
+        self.damage_background = load_image(
+            damage_background_path, SCREEN_WIDTH, SCREEN_HEIGHT, convert_alpha=False
         )
 
         self.health_bar = HealthBar()
         self.ammo_display = AmmoDisplay()
         self.frog_display = FrogDisplay()
         self.score_display = ScoreDisplay()
+        self.hud = HudLayer(self.health_bar, self.ammo_display, self.frog_display,
+                            self.score_display)
 
         self.warning_message_timer = 0
+        self.load_error = None
+        self.load_error_timer = 0
         self.flash_background_timer = 0
         self.flash_background_duration = 10
         self.flash_interval = 10
 
-        self.load_background_music("Assets/background_music.mp3")
+        self.cull_margin = 64
+        self.culled_count = 0
 
-        self.font_large = pygame.font.Font("Assets/ShinyEyes-prr1.ttf", 72)
-        self.font_small = pygame.font.Font("Assets/ShinyEyes-prr1.ttf", 36)
+        if not headless:
+            self.load_background_music("Assets/background_music.mp3")
+
+        self.font_large = load_font("Assets/ShinyEyes-prr1.ttf", 72)
+        self.font_small = load_font("Assets/ShinyEyes-prr1.ttf", 36)
+        self.build_overlays()
+        self.idle_fps = 15
+        self.presented_frame = None
+
+    def load_level(self):
+        if self.streamer is not None:
+            self.streamer.close()
+        if self.level_stream is not None:
+            self.streamer = self.level_stream()
+            level = ([], [], [], [], [])
+        else:
+            level = self.level_factory()
+        self.platforms, self.saws, self.heart_items, self.enemies, self.ammo_items = level
+        self.index = LevelIndex(*level, vectorize=self.vectorize_movers)
+
+    def level_lists(self):
+        return self.platforms, self.saws, self.heart_items, self.enemies, self.ammo_items
+
+    def add_entities(self, level):
+        platforms, saws, heart_items, enemies, ammo_items = level
+        self.platforms.extend(platforms)
+        self.saws.extend(saws)
+        self.heart_items.extend(heart_items)
+        self.enemies.extend(enemies)
+        self.ammo_items.extend(ammo_items)
+        self.index.add_entities(level)
+
+    def remove_entities(self, level):
+        removed = {id(entity) for entities in level for entity in entities}
+        for entities in self.level_lists():
+            entities[:] = [entity for entity in entities if id(entity) not in removed]
+        self.index.remove_entities(level)
+
+    def update_streaming(self):
+        if self.streamer is not None:
+            self.streamer.update(self)
+
+    def load_assets(self):
+        # Files are decoded on the loader thread while this thread converts
+        # them for the display and keeps a loading screen up. Everything built
+        # afterwards finds its assets already in the registry.
+        loader = self.loader
+        loader.start()
+        if self.headless:
+            loader.wait()
+            return
+        while not loader.finished:
+            pygame.event.pump()
+            loader.finish_ready(timeout=self.timestep)
+            self.draw_loading_screen(loader.progress)
+            self.mark_first_frame()
+            pygame.display.flip()
+
+    def draw_loading_screen(self, progress):
+        self.screen.fill((10, 20, 10))
+        bar = pygame.Rect(0, 0, SCREEN_WIDTH // 2, 24)
+        bar.center = (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
+        pygame.draw.rect(self.screen, (100, 255, 30), bar, 2)
+        filled = bar.inflate(-8, -8)
+        filled.width = round(filled.width * progress)
+        self.screen.fill((100, 255, 30), filled)
+
+    def mark_first_frame(self):
+        if self.time_to_first_frame is None:
+            self.time_to_first_frame = perf_counter() - self.started_at
 
     def load_background_music(self, path):
-        pygame.mixer.music.load(path)
+        # Decoding still happens in the mixer, but the file was already read
+        # by the loader. The music stream reads from this buffer while it plays.
+        self.music_file = io.BytesIO(registry.file(path))
+        pygame.mixer.music.load(self.music_file, os.path.splitext(path)[1][1:])
         pygame.mixer.music.set_volume(0.3)
         pygame.mixer.music.play(-1)
 
@@ -71,144 +210,177 @@ class GameLoop:
     def restart_game(self):
         self.game_over = False
         self.game_won = False
-        self.platforms, self.saws, self.heart_items, self.enemies, self.ammo_items = \
-            create_level()
-        self.player = Player(200, 300)
-        self.player.set_game_loop(self)
+        if self.snapshot is not None:
+            self.snapshot.restore(self)
+            self.index.sync_movers()
+        else:
+            self.load_level()
+            self.player = Player(200, 300)
+            self.player.set_game_loop(self)
         self.camera = Camera()
+        self.scheduler = ActivityScheduler()
+        if self.snapshot is not None:
+            self.scheduler.track()
+        self.update_streaming()
         self.frog_display.reset()
 
-    def draw_start_screen(self):
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        overlay.set_alpha(180)
-        overlay.fill((0, 0, 0))
-        self.screen.blit(overlay, (0, 0))
-
-        title_text = self.font_large.render("Wizard Frog", True, (100, 255, 30))
-        title_rect = title_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 50))
-        self.screen.blit(title_text, title_rect)
+    def build_overlays(self):
+        large = self.font_large
+        small = self.font_small
+        white = (255, 255, 255)
+        grey = (200, 200, 200)
+        dim = dim_overlay()
+        self.start_screen = OverlayScreen([
+            (large, "Wizard Frog", (100, 255, 30), -50),
+            (small, "Press SPACE to Start", white, 40),
+        ], dim)
+        self.game_over_screen = OverlayScreen([
+            (large, "GAME OVER", (255, 50, 50), -80),
+            (small, "Final Score: {score}", white, -20),
+            (small, "Press R to Restart", white, 30),
+            (small, "Press ESC to Quit", grey, 70),
+        ], dim)
+        self.victory_screen = OverlayScreen([
+            (large, "VICTORY!", (100, 255, 30), -80),
+            (small, "Final Score: {score}", white, -20),
+            (small, "Press R to Restart", grey, 30),
+            (small, "Press ESC to Quit", grey, 70),
+        ], dim)
+        self.warning_message = OverlayScreen([
+            (small, "Score must be at least 4 to complete the level", (255, 100, 100), 0),
+        ])
+        self.load_error_message = OverlayScreen([
+            (small, "Could not load {path}", (255, 100, 100), 120),
+            (small, "{error}", (255, 100, 100), 160),
+        ])
 
-        start_text = self.font_small.render("Press SPACE to Start", True, (255, 255, 255))
-        start_rect = start_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 40))
-        self.screen.blit(start_text, start_rect)
+    def draw_start_screen(self):
+        self.start_screen.draw(self.canvas)
 
     def draw_game_over(self):
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        overlay.set_alpha(180)
-        overlay.fill((0, 0, 0))
-        self.screen.blit(overlay, (0, 0))
-
-        game_over_text = self.font_large.render("GAME OVER", True, (255, 50, 50))
-        game_over_rect = game_over_text.get_rect(
-            center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 80)
-        )
-        self.screen.blit(game_over_text, game_over_rect)
-
-        score_text = self.font_small.render(f"Final Score: {self.player.score}", True, (255, 255, 255))
-        score_rect = score_text.get_rect(
-            center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 20)
-        )
-        self.screen.blit(score_text, score_rect)
-
-        restart_text = self.font_small.render("Press R to Restart", True, (255, 255, 255))
-        restart_rect = restart_text.get_rect(
-            center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 30)
-        )
-        self.screen.blit(restart_text, restart_rect)
-
-        quit_text = self.font_small.render("Press ESC to Quit", True, (200, 200, 200))
-        quit_rect = quit_text.get_rect(
-            center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 70)
-        )
-        self.screen.blit(quit_text, quit_rect)
+        self.game_over_screen.draw(self.canvas, score=self.player.score)
 
     def draw_victory(self):
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        overlay.set_alpha(180)
-        overlay.fill((0, 0, 0))
-        self.screen.blit(overlay, (0, 0))
-
-        victory_text = self.font_large.render("VICTORY!", True, (100, 255, 30))
-        victory_rect = victory_text.get_rect(
-            center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 80)
-        )
-        self.screen.blit(victory_text, victory_rect)
-
-        score_text = self.font_small.render(f"Final Score: {self.player.score}", True, (255, 255, 255))
-        score_rect = score_text.get_rect(
-            center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 20)
-        )
-        self.screen.blit(score_text, score_rect)
-
-        restart_text = self.font_small.render("Press R to Restart", True, (200, 200, 200))
-        restart_rect = restart_text.get_rect(
-            center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 30)
-        )
-        self.screen.blit(restart_text, restart_rect)
-
-        quit_text = self.font_small.render("Press ESC to Quit", True, (200, 200, 200))
-        quit_rect = quit_text.get_rect(
-            center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 70)
-        )
-        self.screen.blit(quit_text, quit_rect)
-
-    def draw(self):
+        self.victory_screen.draw(self.canvas, score=self.player.score)
+
+    def draw_load_error(self):
+        if self.load_error_timer > 0:
+            path, error = self.load_error
+            self.load_error_message.draw(self.canvas, path=path, error=error)
+
+    def idle_frame(self):
+        # Menus and end screens show the same picture until a key is pressed,
+        # so once one has been presented there is nothing left to draw.
+        if self.profiler.show_overlay or self.load_error_timer > 0:
+            return None
+        if not self.game_started:
+            return "start"
+        if self.game_over or self.game_won:
+            if self.frog_display.remaining_rotation > 0:
+                return None
+            return ("game_over" if self.game_over else "victory", self.player.score)
+        return None
+
+    def draw_visible(self, grid, visible):
+        drawn = 0
+        for entity in grid.query(visible):
+            if visible.colliderect(entity.rect):
+                entity.draw(self.canvas, self.camera)
+                drawn += 1
+        return drawn
+
+    def draw_background(self):
         if self.flash_background_timer > 0:
             if (self.flash_background_timer // self.flash_interval) % 2 == 1:
                 self.screen.blit(self.damage_background, (0, 0))
         else:
-            bg_width = self.background.get_width()
-            bg_height = self.background.get_height()
-
-            tiles_x = (SCREEN_WIDTH // bg_width) + 1
-            tiles_y = (SCREEN_HEIGHT // bg_height) + 1
+            self.background.draw(self.screen, self.camera)
+
+    def draw_world(self):
+        index = self.index
+        visible = self.camera.visible_rect(self.cull_margin)
+        drawn = self.draw_visible(index.platforms, visible)
+        self.player.draw(self.canvas, self.camera)
+        drawn += self.draw_visible(index.saws, visible)
+        drawn += self.draw_visible(index.enemies, visible)
+        drawn += self.draw_visible(index.heart_items, visible)
+        drawn += self.draw_visible(index.ammo_items, visible)
+
+        total = (len(self.platforms) + len(self.saws) + len(self.enemies) +
+                 len(self.heart_items) + len(self.ammo_items))
+        self.culled_count = total - drawn
+
+    def draw_hud(self):
+        player = self.player
+        self.hud.draw(self.canvas, player.health, player.ammo, player.score)
+
+    def present(self):
+        self.mark_first_frame()
+        # With the dirty rect renderer the frame so far is only a display list.
+        # It is drawn here, and only the parts that changed are sent to the
+        # display unless the camera jumped or most of the screen changed.
+        renderer = self.renderer
+        dirty = None
+        if renderer is not None:
+            with self.profiler.phase("draw.dirty"):
+                dirty = renderer.render(self.screen, self.draw_background, self.camera,
+                                        (self.flash_background_timer,
+                                         self.background.state(self.camera)),
+                                        full=self.profiler.show_overlay)
+        self.profiler.draw(self.screen)
+        with self.profiler.phase("draw.flip"):
+            if dirty is None:
+                pygame.display.flip()
+            elif dirty:
+                pygame.display.update(dirty)
 
-            for x in range(tiles_x):
-                for y in range(tiles_y):
-                    tile_x = x * bg_width
-                    tile_y = y * bg_height
-                    self.screen.blit(self.background, (tile_x, tile_y))
+    def draw(self):
+        idle_frame = self.idle_frame()
+        if idle_frame is not None and idle_frame == self.presented_frame:
+            return
+        self.presented_frame = idle_frame
+        self.render()
+        self.present()
+
+    def render(self):
+        # Draws the frame without presenting it. With the dirty rect renderer
+        # the frame is only recorded here and drawn by present().
+        profiler = self.profiler
+        if self.renderer is not None:
+            self.canvas = self.renderer.begin()
+        else:
+            self.canvas = self.screen
+            with profiler.phase("draw.background"):
+                self.draw_background()
 
         if not self.game_started:
-            self.draw_start_screen()
-            pygame.display.flip()
+            with profiler.phase("draw.overlay"):
+                self.draw_start_screen()
+                self.draw_load_error()
             return
 
-        for platform in self.platforms:
-            platform.draw(self.screen, self.camera)
+        with profiler.phase("draw.world"):
+            self.draw_world()
 
-        self.player.draw(self.screen, self.camera)
+        with profiler.phase("draw.hud"):
+            self.draw_hud()
 
-        for saw in self.saws:
-            saw.draw(self.screen, self.camera)
+        with profiler.phase("draw.overlay"):
+            if self.warning_message_timer > 0:
+                self.warning_message.draw(self.canvas)
 
-        for enemy in self.enemies:
-            enemy.draw(self.screen, self.camera)
-
-        for heart_item in self.heart_items:
-            heart_item.draw(self.screen, self.camera)
-
-        for ammo_item in self.ammo_items:
-            ammo_item.draw(self.screen, self.camera)
-
-        self.health_bar.draw(self.screen, self.player.health)
-        self.ammo_display.draw(self.screen, self.player.ammo)
-        self.frog_display.draw(self.screen)
-        self.score_display.draw(self.screen, self.player.score)
-
-        if self.warning_message_timer > 0:
-            warning_text = self.font_small.render("Score must be at least 4 to complete the level", True, (255, 100, 100))
-            warning_rect = warning_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
-            self.screen.blit(warning_text, warning_rect)
-
-        if self.game_over:
-            self.draw_game_over()
-        elif self.game_won:
-            self.draw_victory()
-
-        pygame.display.flip()
+            if self.game_over:
+                self.draw_game_over()
+            elif self.game_won:
+                self.draw_victory()
+            self.draw_load_error()
 
     def update(self):
+        # The frog keeps spinning on the end screens, and steps with the
+        # simulation so its speed does not depend on the render rate.
+        self.frog_display.advance()
+        if self.load_error_timer > 0:
+            self.load_error_timer -= 1
         if self.game_over or self.game_won or not self.game_started:
             return
 
@@ -218,51 +390,185 @@ class GameLoop:
         if self.warning_message_timer > 0:
             self.warning_message_timer -= 1
 
-        keys = pygame.key.get_pressed()
-
-        for platform in self.platforms:
-            platform.update()
-        for saw in self.saws:
-            saw.update()
-        for enemy in self.enemies:
-            enemy.update()
-
-        self.player.handle_input(keys)
-        self.player.update(self.platforms)
-        self.player.check_saw_collision(self.saws)
-        self.player.check_enemy_collision(self.enemies)
-        self.player.check_heart_item_collision(self.heart_items)
-        self.player.check_projectile_collisions(self.enemies)
-        self.player.check_ammo_item_collision(self.ammo_items)
-
-        for projectile in self.player.projectiles[:]:
-            projectile.update()
-            if projectile.is_off_screen(self.camera):
-                self.player.projectiles.remove(projectile)
-
-        self.camera.update(self.player)
+        keys = self.input_source.get_pressed()
+
+        profiler = self.profiler
+        index = self.index
+        player = self.player
+        scheduler = self.scheduler
+
+        # Only entities near the camera are stepped. Everything else sleeps and
+        # is fast-forwarded to the current tick when it comes back into range.
+        # Vectorized movers are cheap enough to step everywhere every tick.
+        with profiler.phase("update.wake"):
+            region = scheduler.wake_region(self.camera, player.rect, index.max_reach)
+            enemy_regions = [region] + scheduler.projectile_regions(player.projectiles,
+                                                                    index.max_reach)
+            saws = index.saws.query(region)
+            if not index.vectorized:
+                platforms = index.platforms.query(region)
+                enemies = index.enemies.query_all(enemy_regions)
+            scheduler.begin_step()
+
+        if index.vectorized:
+            with profiler.phase("update.movers"):
+                index.step_movers()
+            with profiler.phase("update.saws"):
+                scheduler.update(saws)
+            with profiler.phase("update.index"):
+                index.rehash_movers(region, region.unionall(enemy_regions))
+                # The movers' attributes are only read around the camera, the
+                # player and its projectiles, so only those are synced.
+                reach = (self.cull_margin + index.max_reach) * 2
+                near = [self.camera.visible_rect().union(player.rect).inflate(reach, reach)]
+                enemies_near = near
+                if len(enemy_regions) > 1:
+                    enemies_near = near + [enemy_regions[1].unionall(enemy_regions[2:])]
+                index.sync_movers(near, enemies_near)
+        else:
+            with profiler.phase("update.platforms"):
+                scheduler.update(platforms)
+            with profiler.phase("update.saws"):
+                scheduler.update(saws)
+            with profiler.phase("update.enemies"):
+                scheduler.update(enemies)
+            with profiler.phase("update.index"):
+                index.update_movers(platforms, enemies)
+
+        with profiler.phase("player.physics"):
+            player.handle_input(keys)
+            player.update(self.platforms, index.platforms)
+        with profiler.phase("player.check_saw_collision"):
+            player.check_saw_collision(self.saws, index.saws)
+        with profiler.phase("player.check_enemy_collision"):
+            player.check_enemy_collision(self.enemies, index.enemies)
+        with profiler.phase("player.check_heart_item_collision"):
+            player.check_heart_item_collision(self.heart_items, index.heart_items)
+        with profiler.phase("player.check_projectile_collisions"):
+            player.check_projectile_collisions(self.enemies, index.enemies)
+        with profiler.phase("player.check_ammo_item_collision"):
+            player.check_ammo_item_collision(self.ammo_items, index.ammo_items)
+
+        with profiler.phase("update.projectiles"):
+            player.projectiles.update(self.camera)
+
+        self.camera.update(player)
+
+        with profiler.phase("update.streaming"):
+            self.update_streaming()
+
+        scheduler.end_step()
 
         if self.player.player_dead:
             self.game_over = True
 
+    def run_headless(self, frames, render=False, restart=False):
+        # With restart, a game that ends is started over, so the run always
+        # lasts the given number of frames.
+        if not self.game_started:
+            self.record_event("start")
+        self.game_started = True
+        for frame in range(frames):
+            if restart and (self.game_over or self.game_won):
+                self.record_event("restart")
+                self.restart_game()
+            self.profiler.begin_frame()
+            self.update()
+            if render:
+                self.draw()
+            self.profiler.end_frame()
+            if not restart and (self.game_over or self.game_won):
+                return frame + 1
+        return frames
+
+    def handle_events(self):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.running = False
+            elif event.type == pygame.WINDOWEXPOSED:
+                self.presented_frame = None
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    self.running = False
+                if event.key == pygame.K_F3:
+                    self.profiler.toggle()
+                if event.key == pygame.K_F4:
+                    self.export_profile()
+                if event.key == pygame.K_F5:
+                    self.quicksave()
+                if event.key == pygame.K_F9:
+                    self.quickload()
+                if not self.game_started:
+                    if event.key == pygame.K_SPACE:
+                        self.record_event("start")
+                        self.game_started = True
+                if self.game_over or self.game_won:
+                    if event.key == pygame.K_r:
+                        self.record_event("restart")
+                        self.restart_game()
+
+    def record_event(self, kind):
+        if self.recorder is not None:
+            self.recorder.event(kind)
+
+    def save_state(self):
+        return GameState.capture(self)
+
+    def load_state(self, state):
+        state.apply(self)
+
+    def quicksave(self, path=QUICKSAVE_PATH):
+        if self.game_started and self.snapshot is not None:
+            save_game(self, path)
+
+    def quickload(self, path=QUICKSAVE_PATH):
+        # A replay being recorded has no way to express jumping to a saved
+        # state, so quickloading is off while recording.
+        if self.recorder is not None or self.snapshot is None or not os.path.exists(path):
+            return
+        try:
+            load_game(self, path)
+            self.load_error_timer = 0
+        except (OSError, ValueError) as error:
+            # Shown over the game for a few seconds, whatever screen it is on.
+            self.load_error = (path, str(error))
+            self.load_error_timer = 180
+
+    def export_profile(self, trace_path="profile_trace.json", csv_path="profile.csv"):
+        self.profiler.export_chrome_trace(trace_path)
+        self.profiler.export_csv(csv_path)
+
     def run(self):
+        accumulator = 0.0
+        self.clock.tick()
 
         while self.running:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.running = False
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE:
-                        self.running = False
-                    if not self.game_started:
-                        if event.key == pygame.K_SPACE:
-                            self.game_started = True
-                    if self.game_over or self.game_won:
-                        if event.key == pygame.K_r:
-                            self.restart_game()
-            self.clock.tick(FPS)
-            self.update()
+            self.profiler.begin_frame()
+            self.handle_events()
+
+            # Clamp long frames so a stall never queues more simulation steps
+            # than we are willing to catch up on in one go.
+            # Idle screens that are already on display only need to poll input.
+            fps = self.max_render_fps
+            if self.presented_frame is not None and self.idle_frame() == self.presented_frame:
+                fps = self.idle_fps
+            frame_time = self.clock.tick(fps) / 1000
+            accumulator += min(frame_time, self.timestep * self.max_catchup_steps)
+
+            while accumulator >= self.timestep:
+                self.update()
+                accumulator -= self.timestep
+
+            if self.game_started and not (self.game_over or self.game_won):
+                self.camera.set_alpha(accumulator / self.timestep)
+            else:
+                self.camera.set_alpha(1.0)
             self.draw()
+            self.profiler.end_frame()
 
+        if self.recorder is not None:
+            self.recorder.finish(self)
+        if self.streamer is not None:
+            self.streamer.close()
         pygame.mixer.music.stop()
         pygame.quit()
\ No newline at end of file
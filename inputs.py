@@ -0,0 +1,54 @@
+import random
+
+import pygame
+
+
+class KeyState:
+    def __init__(self, keys=()):
+        self.keys = frozenset(keys)
+
+    def __getitem__(self, key):
+        return key in self.keys
+
+
+NO_KEYS = KeyState()
+
+
+class KeyboardInput:
+    def get_pressed(self):
+        return pygame.key.get_pressed()
+
+
+class ScriptedInput:
+    def __init__(self, frames, loop=False):
+        self.frames = [KeyState(keys) for keys in frames]
+        self.loop = loop
+        self.index = 0
+
+    def get_pressed(self):
+        if self.index >= len(self.frames):
+            if not self.loop or not self.frames:
+                return NO_KEYS
+            self.index = 0
+        keys = self.frames[self.index]
+        self.index += 1
+        return keys
+
+
+class RandomInput:
+    def __init__(self, seed=0, hold_frames=15, press_chance=0.4,
+                 keys=(pygame.K_LEFT, pygame.K_RIGHT, pygame.K_SPACE, pygame.K_x)):
+        self.rng = random.Random(seed)
+        self.hold_frames = hold_frames
+        self.press_chance = press_chance
+        self.choices = keys
+        self.keys = NO_KEYS
+        self.frame = 0
+
+    def get_pressed(self):
+        if self.frame % self.hold_frames == 0:
+            self.keys = KeyState(
+                key for key in self.choices if self.rng.random() < self.press_chance
+            )
+        self.frame += 1
+        return self.keys
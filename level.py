@@ -1,3 +1,5 @@
+import random
+
 from entities import *
 from items import *
 
@@ -189,4 +191,46 @@ def create_level():
     winning_platform = Platform(2100, -2400, 50, 20, "win")
     platforms.append(winning_platform)
 
-    return platforms, saws, heart_items, enemies, ammo_items
\ No newline at end of file
+    return platforms, saws, heart_items, enemies, ammo_items
+
+def create_synthetic_level(count, seed=0, width=4000, spacing=20):
+    rng = random.Random(seed)
+    saws = []
+    platforms = []
+    heart_items = []
+    enemies = []
+    ammo_items = []
+
+    top = 400 - max(1000, count * spacing)
+    platform_widths = (50, 80, 100, 150, 200, 300)
+    platform_types = ("normal", "normal", "moving_vertical", "moving_horizontal")
+
+    def random_position():
+        return rng.randrange(-width // 2, width // 2), rng.randrange(top, 400)
+
+    platforms.append(Platform(50, 400, 300, 40))
+    for _ in range(count - 1):
+        x, y = random_position()
+        platform = Platform(x, y, rng.choice(platform_widths), 20,
+                            rng.choice(platform_types))
+        platform.move_range = rng.randrange(50, 300)
+        platform.move_speed = rng.randrange(1, 5)
+        platforms.append(platform)
+    platforms.append(Platform(0, top - 100, 50, 20, "win"))
+
+    for _ in range(count):
+        saws.append(Saw(*random_position()))
+
+    for _ in range(count):
+        enemy = Enemy(*random_position())
+        enemy.move_range = rng.randrange(50, 600)
+        enemy.move_speed = rng.randrange(1, 6)
+        enemies.append(enemy)
+
+    for i in range(count):
+        if i % 2 == 0:
+            heart_items.append(HeartItem(*random_position()))
+        else:
+            ammo_items.append(AmmoItem(*random_position()))
+
+    return platforms, saws, heart_items, enemies, ammo_items
@@ -0,0 +1,269 @@
+import argparse
+import json
+import struct
+import time
+
+from entities import Platform, Saw, Enemy
+from items import HeartItem, AmmoItem
+
+FORMAT_VERSION = 1
+BINARY_MAGIC = b"WFLV"
+
+PLATFORM_TYPES = ("normal", "moving_vertical", "moving_horizontal", "win")
+
+HEADER = struct.Struct("<4sHIIIII")
+PLATFORM_RECORD = struct.Struct("<iiiiBii")
+SAW_RECORD = struct.Struct("<ii")
+ENEMY_RECORD = struct.Struct("<iiii")
+HEART_RECORD = struct.Struct("<ii")
+AMMO_RECORD = struct.Struct("<iii")
+
+DEFAULT_MOVE_SPEED = 2
+DEFAULT_MOVE_RANGE = 100
+DEFAULT_AMMO_AMOUNT = 10
+
+
+def level_to_records(level):
+    platforms, saws, heart_items, enemies, ammo_items = level
+    return {
+        "platforms": [
+            (p.original_x, p.original_y, p.rect.width, p.rect.height,
+             PLATFORM_TYPES.index(p.type), p.move_speed, p.move_range)
+            for p in platforms
+        ],
+        "saws": [(s.x, s.y) for s in saws],
+        "enemies": [(e.original_x, e.original_y, e.move_speed, e.move_range) for e in enemies],
+        "heart_items": [(h.x, h.y) for h in heart_items],
+        "ammo_items": [(a.x, a.y, a.ammo_amount) for a in ammo_items],
+    }
+
+
+def records_to_level(records):
+    platforms = []
+    for x, y, width, height, type_index, move_speed, move_range in records["platforms"]:
+        platform = Platform(x, y, width, height, PLATFORM_TYPES[type_index])
+        platform.move_speed = move_speed
+        platform.move_range = move_range
+        platforms.append(platform)
+
+    saws = [Saw(x, y) for x, y in records["saws"]]
+
+    enemies = []
+    for x, y, move_speed, move_range in records["enemies"]:
+        enemy = Enemy(x, y)
+        enemy.move_speed = move_speed
+        enemy.move_range = move_range
+        enemies.append(enemy)
+
+    heart_items = [HeartItem(x, y) for x, y in records["heart_items"]]
+
+    ammo_items = []
+    for x, y, amount in records["ammo_items"]:
+        ammo_item = AmmoItem(x, y)
+        ammo_item.ammo_amount = amount
+        ammo_items.append(ammo_item)
+
+    return platforms, saws, heart_items, enemies, ammo_items
+
+
+def records_to_json(records):
+    # The JSON form is meant to be edited by hand, so each entity is an object
+    # and fields that match the game's defaults are left out.
+    platforms = []
+    for x, y, width, height, type_index, move_speed, move_range in records["platforms"]:
+        platform = {"x": x, "y": y, "width": width, "height": height}
+        if type_index:
+            platform["type"] = PLATFORM_TYPES[type_index]
+        if move_speed != DEFAULT_MOVE_SPEED:
+            platform["move_speed"] = move_speed
+        if move_range != DEFAULT_MOVE_RANGE:
+            platform["move_range"] = move_range
+        platforms.append(platform)
+
+    enemies = []
+    for x, y, move_speed, move_range in records["enemies"]:
+        enemy = {"x": x, "y": y}
+        if move_speed != DEFAULT_MOVE_SPEED:
+            enemy["move_speed"] = move_speed
+        if move_range != DEFAULT_MOVE_RANGE:
+            enemy["move_range"] = move_range
+        enemies.append(enemy)
+
+    ammo_items = []
+    for x, y, amount in records["ammo_items"]:
+        ammo_item = {"x": x, "y": y}
+        if amount != DEFAULT_AMMO_AMOUNT:
+            ammo_item["ammo_amount"] = amount
+        ammo_items.append(ammo_item)
+
+    return {
+        "version": FORMAT_VERSION,
+        "platforms": platforms,
+        "saws": [{"x": x, "y": y} for x, y in records["saws"]],
+        "enemies": enemies,
+        "heart_items": [{"x": x, "y": y} for x, y in records["heart_items"]],
+        "ammo_items": ammo_items,
+    }
+
+
+def json_to_records(data):
+    if data.get("version", FORMAT_VERSION) > FORMAT_VERSION:
+        raise ValueError(f"Unsupported level version {data['version']}")
+    return {
+        "platforms": [
+            (p["x"], p["y"], p["width"], p["height"],
+             PLATFORM_TYPES.index(p.get("type", "normal")),
+             p.get("move_speed", DEFAULT_MOVE_SPEED),
+             p.get("move_range", DEFAULT_MOVE_RANGE))
+            for p in data.get("platforms", [])
+        ],
+        "saws": [(s["x"], s["y"]) for s in data.get("saws", [])],
+        "enemies": [
+            (e["x"], e["y"], e.get("move_speed", DEFAULT_MOVE_SPEED),
+             e.get("move_range", DEFAULT_MOVE_RANGE))
+            for e in data.get("enemies", [])
+        ],
+        "heart_items": [(h["x"], h["y"]) for h in data.get("heart_items", [])],
+        "ammo_items": [
+            (a["x"], a["y"], a.get("ammo_amount", DEFAULT_AMMO_AMOUNT))
+            for a in data.get("ammo_items", [])
+        ],
+    }
+
+
+def records_to_binary(records):
+    parts = [HEADER.pack(BINARY_MAGIC, FORMAT_VERSION,
+                         len(records["platforms"]), len(records["saws"]),
+                         len(records["enemies"]), len(records["heart_items"]),
+                         len(records["ammo_items"]))]
+    for key, record in (("platforms", PLATFORM_RECORD), ("saws", SAW_RECORD),
+                        ("enemies", ENEMY_RECORD), ("heart_items", HEART_RECORD),
+                        ("ammo_items", AMMO_RECORD)):
+        parts.extend(record.pack(*row) for row in records[key])
+    return b"".join(parts)
+
+
+def binary_to_records(data):
+    magic, version, *counts = HEADER.unpack_from(data)
+    if magic != BINARY_MAGIC:
+        raise ValueError("Not a Wizard Frog binary level")
+    if version > FORMAT_VERSION:
+        raise ValueError(f"Unsupported level version {version}")
+
+    records = {}
+    offset = HEADER.size
+    for key, record, count in zip(
+            ("platforms", "saws", "enemies", "heart_items", "ammo_items"),
+            (PLATFORM_RECORD, SAW_RECORD, ENEMY_RECORD, HEART_RECORD, AMMO_RECORD),
+            counts):
+        end = offset + record.size * count
+        records[key] = list(record.iter_unpack(data[offset:end]))
+        offset = end
+    return records
+
+
+def format_json(data):
+    # One entity per line keeps level files short and diffs readable.
+    lines = ["{", f'  "version": {data["version"]},']
+    keys = [key for key in data if key != "version"]
+    for i, key in enumerate(keys):
+        entities = data[key]
+        closing = "]" if i == len(keys) - 1 else "],"
+        if not entities:
+            lines.append(f'  "{key}": [{closing}')
+            continue
+        lines.append(f'  "{key}": [')
+        for j, entity in enumerate(entities):
+            separator = "," if j < len(entities) - 1 else ""
+            lines.append("    " + json.dumps(entity) + separator)
+        lines.append("  " + closing)
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def save_level(level, path):
+    records = level_to_records(level)
+    if path.endswith(".json"):
+        with open(path, "w") as f:
+            f.write(format_json(records_to_json(records)))
+    else:
+        with open(path, "wb") as f:
+            f.write(records_to_binary(records))
+
+
+def load_records(path):
+    if path.endswith(".json"):
+        with open(path) as f:
+            return json_to_records(json.load(f))
+    with open(path, "rb") as f:
+        return binary_to_records(f.read())
+
+
+def load_level(path):
+    return records_to_level(load_records(path))
+
+
+def level_loader(path):
+    return lambda: load_level(path)
+
+
+def measure_load(path, repeats=3):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        level = load_level(path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, sum(len(entities) for entities in level)
+
+
+def main():
+    import os
+    import pygame
+    from level import create_level, create_synthetic_level
+
+    parser = argparse.ArgumentParser(description="Wizard Frog level files")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="write the create_level() layout to a file")
+    export.add_argument("output", help="level file, .json for JSON, anything else for binary")
+
+    convert = commands.add_parser("convert", help="convert between JSON and binary levels")
+    convert.add_argument("input")
+    convert.add_argument("output")
+
+    bench = commands.add_parser("bench", help="time loading a large synthetic level")
+    bench.add_argument("--entities", type=int, default=100000)
+    bench.add_argument("--budget", type=float, default=0.5,
+                       help="maximum seconds allowed to load the binary level")
+    bench.add_argument("--directory", default=".")
+    args = parser.parse_args()
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+
+    if args.command == "export":
+        save_level(create_level(), args.output)
+    elif args.command == "convert":
+        save_level(load_level(args.input), args.output)
+    else:
+        level = create_synthetic_level(args.entities // 4)
+        json_path = os.path.join(args.directory, "bench_level.json")
+        binary_path = os.path.join(args.directory, "bench_level.lvl")
+        save_level(level, json_path)
+        save_level(level, binary_path)
+
+        json_time, count = measure_load(json_path)
+        binary_time, _ = measure_load(binary_path)
+        print(f"{count} entities: JSON {json_time * 1000:.1f} ms "
+              f"({os.path.getsize(json_path) // 1024} KiB), "
+              f"binary {binary_time * 1000:.1f} ms "
+              f"({os.path.getsize(binary_path) // 1024} KiB)")
+        if binary_time > args.budget:
+            raise SystemExit(f"Binary load took {binary_time:.3f}s, over the "
+                             f"{args.budget:.3f}s budget")
+
+
+if __name__ == "__main__":
+    main()
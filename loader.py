@@ -0,0 +1,142 @@
+import os
+import queue
+import threading
+from time import perf_counter
+
+import pygame
+
+from assets import registry
+
+# Everything the game loads before its first frame. Images are
+# (kind, path, convert_alpha).
+MANIFEST = (
+    ("image", "Assets/Background.png", False),
+    ("image", "Assets/Background2.png", False),
+    ("image", "Assets/Player.png", True),
+    ("image", "Assets/Platform.png", True),
+    ("image", "Assets/Saw.png", True),
+    ("image", "Assets/Enemy.png", True),
+    ("image", "Assets/Heart.png", True),
+    ("image", "Assets/Ammo.png", True),
+    ("image", "Assets/Frog.png", True),
+    ("file", "Assets/ShinyEyes-prr1.ttf"),
+    ("sound", "Assets/damage.wav"),
+    ("sound", "Assets/collection.wav"),
+    ("sound", "Assets/shoot.wav"),
+    ("file", "Assets/background_music.mp3"),
+)
+
+
+def read_file(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+LOADERS = {
+    "image": pygame.image.load,
+    "sound": pygame.mixer.Sound,
+    "file": read_file,
+}
+
+
+class AssetLoader:
+    # Reads and decodes the manifest on a background thread. Whatever has to
+    # touch the display (converting images to its pixel format) is left to
+    # finish_ready(), which the main thread calls between loading screen frames.
+    def __init__(self, manifest=MANIFEST, registry=registry):
+        self.manifest = list(manifest)
+        self.registry = registry
+        self.ready = queue.Queue()
+        self.thread = None
+        self.loaded = 0
+        self.timings = {}
+        self.started_at = None
+        self.elapsed = None
+
+    @property
+    def total(self):
+        return len(self.manifest)
+
+    @property
+    def progress(self):
+        return self.loaded / self.total if self.total else 1.0
+
+    @property
+    def finished(self):
+        return self.loaded == self.total
+
+    def cached(self, entry):
+        kind, path = entry[:2]
+        if kind == "image":
+            return (path, None, False, entry[2]) in self.registry.images
+        if kind == "sound":
+            return path in self.registry.sounds
+        return path in self.registry.files
+
+    def start(self):
+        # Assets an earlier loader already put in the registry are skipped,
+        # so building another game in the same process does no asset I/O.
+        self.started_at = perf_counter()
+        self.manifest = [entry for entry in self.manifest if not self.cached(entry)]
+        if self.finished:
+            self.elapsed = 0.0
+            return
+        self.thread = threading.Thread(target=self.load_all, name="asset-loader", daemon=True)
+        self.thread.start()
+
+    def load_all(self):
+        for entry in self.manifest:
+            kind, path = entry[:2]
+            start = perf_counter()
+            try:
+                asset = LOADERS[kind](path)
+                size = os.path.getsize(path)
+            except Exception as error:
+                asset = error
+                size = 0
+            self.ready.put((entry, asset, size, perf_counter() - start))
+
+    def finish_ready(self, timeout=0.0):
+        # Finishes every asset decoded so far, waiting up to timeout for the
+        # first one if none are ready yet.
+        deadline = perf_counter() + timeout
+        while not self.finished:
+            try:
+                entry, asset, size, load_time = self.ready.get(
+                    timeout=max(0.0, deadline - perf_counter())
+                )
+            except queue.Empty:
+                return
+            if isinstance(asset, Exception):
+                raise asset
+            self.finish(entry, asset, size, load_time)
+
+    def finish(self, entry, asset, size, load_time):
+        kind, path = entry[:2]
+        start = perf_counter()
+        if kind == "image":
+            self.registry.add_image(path, asset, entry[2])
+        elif kind == "sound":
+            self.registry.sounds[path] = asset
+        else:
+            self.registry.files[path] = asset
+        self.timings[path] = {
+            "kind": kind,
+            "load_ms": load_time * 1000,
+            "finish_ms": (perf_counter() - start) * 1000,
+            "bytes": size,
+        }
+        self.loaded += 1
+        if self.finished:
+            self.elapsed = perf_counter() - self.started_at
+
+    def wait(self):
+        while not self.finished:
+            self.finish_ready(timeout=1.0)
+
+    def report(self):
+        lines = []
+        for path, timing in sorted(self.timings.items(), key=lambda item: -item[1]["load_ms"]):
+            lines.append(f"{path:<36} {timing['kind']:<6} load {timing['load_ms']:7.2f} ms  "
+                         f"finish {timing['finish_ms']:6.2f} ms  {timing['bytes'] // 1024:>6} KiB")
+        return "\n".join(lines)
@@ -1,8 +1,87 @@
+import argparse
+import time
+
 from game_loop import GameLoop
+from inputs import RandomInput, ScriptedInput
+from level import create_level
+from level_format import level_loader, load_records
+from replay import InputRecorder
+from streaming import LevelStreamer
+
+def print_startup_report(game):
+    print(game.loader.report())
+    print(f"assets loaded in {game.loader.elapsed * 1000:.1f} ms")
+    if game.time_to_first_frame is not None:
+        print(f"first frame after {game.time_to_first_frame * 1000:.1f} ms")
 
 def main():
-    game = GameLoop()
-    game.run()
+    parser = argparse.ArgumentParser(description="Wizard Frog")
+    parser.add_argument("--headless", action="store_true",
+                        help="simulate without a window as fast as possible")
+    parser.add_argument("--frames", type=int, default=10000,
+                        help="number of frames to simulate in headless mode")
+    parser.add_argument("--input", choices=("random", "idle"), default="random",
+                        help="input for headless mode: random key presses or none")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the random headless input")
+    parser.add_argument("--render", action="store_true",
+                        help="also draw each frame off-screen in headless mode")
+    parser.add_argument("--level", help="load the level from a .json or binary level file")
+    parser.add_argument("--stream", action="store_true",
+                        help="stream the --level file in chunks around the camera")
+    parser.add_argument("--scalar-movers", action="store_true",
+                        help="update moving platforms and enemies one at a time even "
+                             "when NumPy is available")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="only redraw and update the parts of the screen that changed")
+    parser.add_argument("--parallax", type=float, metavar="FACTOR",
+                        help="scroll the background at FACTOR times the camera speed")
+    parser.add_argument("--record", metavar="PATH",
+                        help="record the session's input to a replay file")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="print how long each asset took to load and the time to "
+                             "the first frame")
+    args = parser.parse_args()
+
+    level_factory = level_loader(args.level) if args.level else create_level
+    level_stream = None
+    if args.level and args.stream:
+        level_stream = lambda: LevelStreamer(load_records(args.level))
+    vectorize_movers = False if args.scalar_movers else None
+    background_layers = None
+    if args.parallax is not None:
+        background_layers = [("Assets/Background.png", args.parallax, args.parallax)]
+
+    recorder = None
+    if args.record:
+        recorder = InputRecorder(args.record, {"level": args.level, "stream": args.stream})
+
+    if not args.headless:
+        game = GameLoop(level_factory=level_factory, level_stream=level_stream,
+                        vectorize_movers=vectorize_movers, dirty_rects=args.dirty_rects,
+                        background_layers=background_layers, recorder=recorder)
+        if args.startup_report:
+            print_startup_report(game)
+        game.run()
+        return
+
+    input_source = RandomInput(args.seed) if args.input == "random" else ScriptedInput([])
+    game = GameLoop(headless=True, input_source=input_source, level_factory=level_factory, level_stream=level_stream,
+                    vectorize_movers=vectorize_movers, dirty_rects=args.dirty_rects,
+                    background_layers=background_layers, recorder=recorder)
+    if args.startup_report:
+        print_startup_report(game)
+    start = time.perf_counter()
+    frames = game.run_headless(args.frames, render=args.render, restart=True)
+    elapsed = time.perf_counter() - start
+    if recorder is not None:
+        recorder.finish(game)
+    # A run of no frames, or one too short for the clock, has no frame rate.
+    rate = f" ({frames / elapsed:.0f} fps)" if frames and elapsed > 0 else ""
+    print(f"{frames} frames in {elapsed:.3f}s{rate}")
+    if game.renderer is not None and game.renderer.frames:
+        print(f"{game.renderer.average_fraction():.1%} of the screen redrawn per frame, "
+              f"{game.renderer.full_frames} full redraws")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
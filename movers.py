@@ -0,0 +1,279 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class MoverEngine:
+    # Bound entities keep their own attributes, which are only brought up to
+    # date from the arrays by sync(). Anything that changes them directly has
+    # to store() them back.
+    ARRAYS = {
+        "x": "int32", "y": "int32", "width": "int32", "height": "int32",
+        "origin_x": "int32", "origin_y": "int32", "horizontal": "int32",
+        "prev_x": "int32", "prev_y": "int32", "vel_x": "int32", "vel_y": "int32",
+        "move_speed": "int32", "move_range": "int32", "move_direction": "int32",
+        "current_frame": "int32", "num_frames": "int32",
+        "frame_counter": "float64", "animation_speed": "float64",
+        "cell_x0": "int32", "cell_y0": "int32", "cell_x1": "int32", "cell_y1": "int32",
+    }
+    # The mover fields step() changes. The rest stay as the entity set them.
+    STEPPED = ("prev_x", "prev_y", "vel_x", "vel_y", "move_direction", "current_frame",
+               "frame_counter")
+
+    def __init__(self, cell_size=256, capacity=256):
+        if np is None:
+            raise ImportError("MoverEngine requires NumPy")
+        self.cell_size = cell_size
+        self.capacity = capacity
+        self.count = 0
+        self.entities = []
+        self.tick = 0
+        self.fields = ()
+        self.animated = False
+        self.journal = None
+        for name, dtype in self.ARRAYS.items():
+            setattr(self, name, np.zeros(capacity, dtype))
+
+    def __len__(self):
+        return self.count
+
+    def grow(self):
+        self.capacity *= 2
+        for name, dtype in self.ARRAYS.items():
+            array = np.zeros(self.capacity, dtype)
+            array[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, array)
+
+    def add(self, entity, horizontal=True):
+        # Same catch-up as ActivityScheduler.update, so an entity that was out
+        # of the world for a while rejoins where it would have been.
+        asleep = self.tick - entity.last_tick - 1
+        if asleep > 0:
+            entity.fast_forward(asleep)
+
+        if self.count == self.capacity:
+            self.grow()
+        i = self.count
+        rect = entity.rect
+        size = self.cell_size
+        self.x[i] = rect.x
+        self.y[i] = rect.y
+        self.width[i] = rect.width
+        self.height[i] = rect.height
+        # The fixed axis uses its own coordinate as the origin, so step() can
+        # add both offsets together instead of picking one per entity.
+        self.origin_x[i] = entity.original_x if horizontal else rect.x
+        self.origin_y[i] = rect.y if horizontal else entity.original_y
+        self.horizontal[i] = horizontal
+        self.cell_x0[i] = rect.left // size
+        self.cell_y0[i] = rect.top // size
+        self.cell_x1[i] = (rect.right - 1) // size
+        self.cell_y1[i] = (rect.bottom - 1) // size
+
+        frames = getattr(entity, "frames", None)
+        self.current_frame[i] = 0
+        self.frame_counter[i] = 0
+        self.animation_speed[i] = 0
+        self.num_frames[i] = len(frames) if frames else 1
+        for name in entity.mover_fields:
+            getattr(self, name)[i] = getattr(entity, name)
+        if not frames:
+            self.animation_speed[i] = 0
+        elif self.animation_speed[i]:
+            self.animated = True
+
+        entity.movers = self
+        entity.slot = i
+        self.fields = tuple(name for name in self.STEPPED if name in entity.mover_fields)
+        self.entities.append(entity)
+        self.count += 1
+
+    def remove(self, entity):
+        i = entity.slot
+        journal = self.journal
+        if journal is not None and id(entity) not in journal:
+            journal[id(entity)] = (entity, i)
+        self.sync([i])
+        entity.movers = None
+        entity.last_tick = self.tick - 1
+
+        last = self.count - 1
+        moved = self.entities.pop()
+        if i != last:
+            for name in self.ARRAYS:
+                array = getattr(self, name)
+                array[i] = array[last]
+            self.entities[i] = moved
+            if journal is not None and id(moved) not in journal:
+                journal[id(moved)] = (moved, last)
+            moved.slot = i
+        self.count -= 1
+
+    def snapshot(self):
+        # Every bound entity moves every step, so the arrays are saved whole.
+        # From here on, entities that are removed or change slots are
+        # journaled, and restore() only has to bind those again.
+        self.journal = {}
+        count = self.count
+        arrays = {name: getattr(self, name)[:count].copy() for name in self.ARRAYS}
+        return count, self.tick, list(self.entities), arrays
+
+    def restore(self, snapshot):
+        count, tick, entities, arrays = snapshot
+        for name, values in arrays.items():
+            getattr(self, name)[:count] = values
+        if self.journal:
+            self.entities[:] = entities
+            for entity, slot in self.journal.values():
+                entity.movers = self
+                entity.slot = slot
+            self.journal.clear()
+        self.count = count
+        self.tick = tick
+        # The entities are synced by the caller once everything is restored.
+
+    def save(self):
+        # The state since snapshot(): the arrays, plus the entities that were
+        # unbound or moved to another slot.
+        count = self.count
+        arrays = {name: getattr(self, name)[:count].copy() for name in self.ARRAYS}
+        unbound = []
+        moved = []
+        for entity, slot in self.journal.values():
+            if entity.movers is None:
+                unbound.append(entity)
+            elif entity.slot != slot:
+                moved.append((entity, entity.slot))
+        return count, self.tick, arrays, unbound, moved
+
+    def load(self, state):
+        # Applies a save() on top of the state restore() put back, journaling
+        # as it goes so the next restore() still works.
+        count, tick, arrays, unbound, moved = state
+        journal = self.journal
+        for entity in unbound:
+            if id(entity) not in journal:
+                journal[id(entity)] = (entity, entity.slot)
+            entity.movers = None
+        entities = self.entities
+        for entity, slot in moved:
+            if id(entity) not in journal:
+                journal[id(entity)] = (entity, entity.slot)
+            entities[slot] = entity
+            entity.slot = slot
+        del entities[count:]
+        for name, values in arrays.items():
+            getattr(self, name)[:count] = values
+        self.count = count
+        self.tick = tick
+
+    def slots_in(self, *regions):
+        # Slots of the entities overlapping any of the regions, or of all of
+        # them when no region is given.
+        n = self.count
+        if not regions:
+            return np.arange(n)
+        x = self.x[:n]
+        y = self.y[:n]
+        found = None
+        for region in regions:
+            inside = x < region.right
+            inside &= y < region.bottom
+            inside &= x > region.left - self.width[:n]
+            inside &= y > region.top - self.height[:n]
+            if found is None:
+                found = inside
+            else:
+                found |= inside
+        return np.flatnonzero(found)
+
+    def sync(self, slots=None):
+        # Writes the arrays back to the rects and stepped fields of the
+        # entities in slots, or of all of them.
+        slots = np.arange(self.count) if slots is None else np.asarray(slots)
+        if not len(slots):
+            return
+        fields = self.fields
+        columns = [getattr(self, name)[slots].tolist() for name in ("x", "y") + fields]
+        entities = self.entities
+        for i, x, y, *values in zip(slots.tolist(), *columns):
+            entity = entities[i]
+            rect = entity.rect
+            rect.x = x
+            rect.y = y
+            entity.__dict__.update(zip(fields, values))
+
+    def store(self, entity):
+        # Writes a bound entity's rect and movement fields to its slot, for
+        # code that changes them directly, e.g. load_state().
+        i = entity.slot
+        rect = entity.rect
+        self.x[i] = rect.x
+        self.y[i] = rect.y
+        for name in self.fields:
+            getattr(self, name)[i] = getattr(entity, name)
+
+    def step(self):
+        # Platform.update and Enemy.update for every bound entity at once.
+        self.tick += 1
+        n = self.count
+        if n == 0:
+            return
+
+        x = self.x[:n]
+        y = self.y[:n]
+        self.prev_x[:n] = x
+        self.prev_y[:n] = y
+
+        vel_x = self.vel_x[:n]
+        vel_y = self.vel_y[:n]
+        direction = self.move_direction[:n]
+        velocity = self.move_speed[:n] * direction
+        np.multiply(velocity, self.horizontal[:n], out=vel_x)
+        np.subtract(velocity, vel_x, out=vel_y)
+        x += vel_x
+        y += vel_y
+
+        offset = x - self.origin_x[:n]
+        offset += y
+        offset -= self.origin_y[:n]
+        np.abs(offset, out=offset)
+        np.negative(direction, out=direction, where=offset > self.move_range[:n])
+
+        if self.animated:
+            frame_counter = self.frame_counter[:n]
+            frame_counter += self.animation_speed[:n]
+            wrapped = np.flatnonzero(frame_counter >= 1)
+            if len(wrapped):
+                frame_counter[wrapped] = 0
+                self.current_frame[wrapped] = (
+                    (self.current_frame[wrapped] + 1) % self.num_frames[wrapped]
+                )
+
+    def moved_cells(self, candidates=None):
+        # Slots of the entities whose spatial hash cells changed since they
+        # were last filed. With candidates (see slots_in), only those slots are
+        # refiled; the rest stay under stale cells until they come back into
+        # range, the same way sleeping entities do.
+        if candidates is None:
+            candidates = np.arange(self.count)
+        if not len(candidates):
+            return candidates
+        x = self.x[candidates]
+        y = self.y[candidates]
+
+        size = self.cell_size
+        spans = (
+            (self.cell_x0, x // size),
+            (self.cell_y0, y // size),
+            (self.cell_x1, (x + self.width[candidates] - 1) // size),
+            (self.cell_y1, (y + self.height[candidates] - 1) // size),
+        )
+        changed = np.zeros(len(candidates), bool)
+        for cells, current in spans:
+            changed |= cells[candidates] != current
+        moved = candidates[changed]
+        for cells, current in spans:
+            cells[moved] = current[changed]
+        return moved
@@ -1,8 +1,10 @@
 import pygame
 
 from constants import GRAVITY, FALL_SPEED
-from entities import Projectile
+from entities import ProjectilePool
 from functions import update_animation_frame, load_sprite_sheet
+from profiler import NULL_PROFILER
+from sounds import sound_bank
 
 class Player:
     def __init__(self, x, y, sprite_sheet_path="Assets/Player.png"):
@@ -13,6 +15,8 @@ class Player:
         self.hitbox_width = 35
         self.hitbox_height = 55
         self.rect = pygame.Rect(x, y, self.hitbox_width, self.hitbox_height)
+        self.prev_x = x
+        self.prev_y = y
 
         self.vel_x = 0
         self.vel_y = 0
@@ -28,6 +32,7 @@ class Player:
         self.damage_cooldown_max = 60
         self.invincible = False
         self.game_loop = None
+        self.profiler = NULL_PROFILER
         self.sprite_sheet = None
 
         self.animations = {
@@ -41,7 +46,7 @@ class Player:
         self.current_frame = 0
         self.frame_counter = 0
 
-        self.projectiles = []
+        self.projectiles = ProjectilePool()
         self.shoot_cooldown = 0
         self.shoot_cooldown_max = 20
         self.ammo = 30
@@ -60,21 +65,23 @@ class Player:
 
         self.load_player_assets(sprite_sheet_path)
 
-        self.damage_sound = None
-        self.collection_sound = None
-        self.shoot_sound = None
-        self.load_sounds()
+        self.sounds = sound_bank.load()
 
     def set_game_loop(self, game_loop_instance):
         self.game_loop = game_loop_instance
+        self.profiler = game_loop_instance.profiler
 
-    def load_sounds(self):
-        self.damage_sound = pygame.mixer.Sound("Assets/damage.wav")
-        self.damage_sound.set_volume(0.2)
-        self.collection_sound = pygame.mixer.Sound("Assets/collection.wav")
-        self.collection_sound.set_volume(1.5)
-        self.shoot_sound = pygame.mixer.Sound("Assets/shoot.wav")
-        self.shoot_sound.set_volume(1.5)
+    def save_state(self):
+        # Frames, sounds and the projectile pool are shared with the restored
+        # player, so a shallow copy is enough apart from the rect.
+        state = dict(self.__dict__)
+        state["rect"] = self.rect.copy()
+        return state
+
+    def load_state(self, state):
+        self.__dict__.update(state)
+        self.rect = state["rect"].copy()
+        self.projectiles.clear()
 
     def load_player_assets(self, path, frame_width=32, frame_height=32,
                            idle_frames=2, walk_frames=3, jump_frames=2):
@@ -101,9 +108,16 @@ class Player:
         self.animations['jump'] = all_frames[current_index: current_index + jump_frames]
         current_index += jump_frames
 
-        for frame in self.animations['walk_right']:
-            flipped = pygame.transform.flip(frame, True, False)
-            self.animations['walk_left'].append(flipped)
+        flipped_frames = load_sprite_sheet(
+            path,
+            frame_width,
+            frame_height,
+            total_frames,
+            scale_width=self.width,
+            scale_height=self.height,
+            flip_x=True
+        )
+        self.animations['walk_left'] = flipped_frames[idle_frames: idle_frames + walk_frames]
 
         if self.animations['jump']:
             self.animations['fall'] = [self.animations['jump'][-1]]
@@ -150,7 +164,8 @@ class Player:
             self.width,
             self.height
         )
-        draw_rect = camera.apply(sprite_rect)
+        draw_rect = camera.apply(sprite_rect, self.rect.x - self.prev_x,
+                                 self.rect.y - self.prev_y)
 
         if self.animations[self.current_animation] and \
                 len(self.animations[self.current_animation]) > 0:
@@ -162,7 +177,7 @@ class Player:
             current_surface = frames[self.current_frame]
             screen.blit(current_surface, draw_rect)
         else:
-            pygame.draw.rect(screen, (100, 100, 200), draw_rect)
+            screen.fill((100, 100, 200), draw_rect)
 
         for projectile in self.projectiles:
             projectile.draw(screen, camera)
@@ -188,12 +203,17 @@ class Player:
             projectile_x = self.rect.centerx
             projectile_y = self.rect.centery
             direction = 1 if self.facing_right else -1
-            self.projectiles.append(Projectile(projectile_x, projectile_y, direction))
+            self.projectiles.spawn(projectile_x, projectile_y, direction)
             self.shoot_cooldown = self.shoot_cooldown_max
             self.ammo -= 1
-            self.shoot_sound.play()
+            self.sounds.play("shoot")
             self.shoot_anim_timer = 15
 
+    def nearby(self, entities, grid):
+        if grid is None:
+            return entities
+        return grid.query(self.rect.inflate(self.rect.width * 2, self.rect.height * 2))
+
     def check_collision_x(self, platforms):
         for platform in platforms:
             if not self.rect.colliderect(platform.rect):
@@ -247,7 +267,10 @@ class Player:
                     self.y = self.rect.y
                     self.vel_y = 0
 
-    def update(self, platforms):
+    def update(self, platforms, grid=None):
+        self.prev_x = self.rect.x
+        self.prev_y = self.rect.y
+
         if self.damage_cooldown > 0:
             self.damage_cooldown -= 1
             if self.damage_cooldown == 0:
@@ -270,11 +293,13 @@ class Player:
 
         self.y += self.vel_y
         self.rect.y = round(self.y)
-        self.check_collision_y(platforms)
+        with self.profiler.phase("player.check_collision_y"):
+            self.check_collision_y(self.nearby(platforms, grid))
 
         self.x += self.vel_x
         self.rect.x = round(self.x)
-        self.check_collision_x(platforms)
+        with self.profiler.phase("player.check_collision_x"):
+            self.check_collision_x(self.nearby(platforms, grid))
 
         if self.y >= 1000:
             self.health -= 100
@@ -286,60 +311,110 @@ class Player:
         if self.shoot_cooldown > 0:
             self.shoot_cooldown -= 1
 
-    def check_saw_collision(self, saws):
+    def check_saw_collision(self, saws, grid=None):
         if self.invincible:
             return
 
-        for saw in saws:
+        for saw in self.nearby(saws, grid):
             if self.rect.colliderect(saw.rect):
                 self.health -= 20
                 self.damage_cooldown = self.damage_cooldown_max
                 self.invincible = True
-                self.damage_sound.play()
+                self.sounds.play("damage")
                 if self.game_loop:
                     self.game_loop.trigger_background_flash()
                 break
 
-    def check_enemy_collision(self, enemies):
+    def check_enemy_collision(self, enemies, grid=None):
         if self.invincible:
             return
 
-        for enemy in enemies:
+        for enemy in self.nearby(enemies, grid):
             if self.rect.colliderect(enemy.rect):
                 self.health -= 20
                 self.damage_cooldown = self.damage_cooldown_max
                 self.invincible = True
-                self.damage_sound.play()
+                self.sounds.play("damage")
                 if self.game_loop:
                     self.game_loop.trigger_background_flash()
                 break
 
-    def check_heart_item_collision(self, heart_items):
-        for heart_item in heart_items:
+    def check_heart_item_collision(self, heart_items, grid=None):
+        for heart_item in self.nearby(heart_items, grid):
             if self.rect.colliderect(heart_item.rect):
                 self.health = min(self.health + 20, 200)
                 heart_items.remove(heart_item)
-                self.collection_sound.play()
+                if grid is not None:
+                    grid.remove(heart_item)
+                self.sounds.play("collection")
                 break
 
-    def check_projectile_collisions(self, enemies):
-        for projectile in self.projectiles[:]:
-            for enemy in enemies:
-                if projectile.rect.colliderect(enemy.rect):
-                    if projectile in self.projectiles:
-                        self.projectiles.remove(projectile)
-                    enemy.health -= 20
-                    if enemy.health <= 0 and enemy in enemies:
-                        enemies.remove(enemy)
-                        self.score += 1
-                        if self.game_loop:
-                            self.game_loop.trigger_score_event()
-                    break
-
-    def check_ammo_item_collision(self, ammo_items):
-        for ammo_item in ammo_items[:]:
+    def check_projectile_collisions(self, enemies, grid=None):
+        projectiles = self.projectiles
+        if not projectiles.count:
+            return
+
+        # Every live projectile is tested against the enemies in one batch.
+        # Hits come back in the same order the old per-projectile loop walked
+        # its candidates, so each projectile still hits the same enemy first.
+        live = projectiles.slots[:projectiles.count]
+        rects = [projectile.rect for projectile in live]
+        if grid is not None:
+            found = grid.collide_all(rects)
+        else:
+            enemy_rects = [enemy.rect for enemy in enemies]
+            found = {}
+            for i, rect in enumerate(rects):
+                colliding = rect.collidelistall(enemy_rects)
+                if colliding:
+                    found[i] = [enemies[j] for j in colliding]
+        if not found:
+            return
+        hits = {id(live[i]): targets for i, targets in found.items()}
+
+        # Resolve hits in the order the pool is walked. A retired slot is
+        # refilled from the end, so which projectile reaches an enemy first
+        # (and which ones fly on past a kill) matches the sequential loop.
+        killed = {}
+        index = 0
+        while index < projectiles.count:
+            for enemy in hits.get(id(projectiles.slots[index]), ()):
+                if id(enemy) in killed:
+                    continue
+                projectiles.retire(index)
+                if self.game_loop:
+                    self.game_loop.scheduler.touch(enemy)
+                enemy.health -= 20
+                if enemy.health <= 0:
+                    killed[id(enemy)] = enemy
+                break
+            else:
+                index += 1
+
+        if not killed:
+            return
+        # list.remove is a quick scan in C, so it wins until enough enemies
+        # die together that one rebuild of the list is cheaper.
+        if len(killed) < 16:
+            for enemy in killed.values():
+                enemies.remove(enemy)
+        else:
+            enemies[:] = [enemy for enemy in enemies if id(enemy) not in killed]
+        for enemy in killed.values():
+            if grid is not None:
+                grid.remove(enemy)
+            if enemy.movers is not None:
+                enemy.movers.remove(enemy)
+            self.score += 1
+            if self.game_loop:
+                self.game_loop.trigger_score_event()
+
+    def check_ammo_item_collision(self, ammo_items, grid=None):
+        for ammo_item in self.nearby(ammo_items, grid):
             if self.rect.colliderect(ammo_item.rect):
                 self.ammo = min(self.ammo + ammo_item.ammo_amount, self.max_ammo)
                 ammo_items.remove(ammo_item)
-                self.collection_sound.play()
+                if grid is not None:
+                    grid.remove(ammo_item)
+                self.sounds.play("collection")
                 break
\ No newline at end of file
@@ -0,0 +1,173 @@
+import csv
+import json
+from collections import deque
+from time import perf_counter
+
+import pygame
+
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT
+from functions import load_font
+
+
+class NullPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NULL_PHASE = NullPhase()
+
+
+class Phase:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler.record(self.name, self.start, perf_counter())
+        return False
+
+
+class FrameProfiler:
+    def __init__(self, history=240, max_trace_events=500000, max_frame_rows=36000):
+        self.enabled = False
+        self.show_overlay = False
+        self.history = history
+        self.max_trace_events = max_trace_events
+
+        self.phases = {}
+        self.phase_names = []
+        self.current = {}
+        self.frame_start = None
+        self.frame_times = deque(maxlen=history)
+        self.phase_times = {}
+
+        self.origin = perf_counter()
+        self.frame_number = 0
+        self.trace_events = []
+        self.frame_rows = deque(maxlen=max_frame_rows)
+
+        self.font = None
+        self.overlay = None
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.show_overlay = self.enabled
+        self.frame_start = None
+
+    def phase(self, name):
+        if not self.enabled:
+            return NULL_PHASE
+        phase = self.phases.get(name)
+        if phase is None:
+            phase = self.phases[name] = Phase(self, name)
+            self.phase_names.append(name)
+            self.phase_times[name] = deque(maxlen=self.history)
+        return phase
+
+    def record(self, name, start, end):
+        duration = end - start
+        self.current[name] = self.current.get(name, 0.0) + duration
+        if len(self.trace_events) < self.max_trace_events:
+            self.trace_events.append((name, start, duration))
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.frame_start = perf_counter()
+        self.current = {}
+
+    def end_frame(self):
+        if not self.enabled or self.frame_start is None:
+            return
+        end = perf_counter()
+        frame_time = end - self.frame_start
+        self.frame_times.append(frame_time)
+        for name in self.phase_names:
+            self.phase_times[name].append(self.current.get(name, 0.0))
+
+        self.frame_number += 1
+        if len(self.trace_events) < self.max_trace_events:
+            self.trace_events.append(("frame", self.frame_start, frame_time))
+        self.frame_rows.append((self.frame_number, frame_time, self.current))
+        self.frame_start = None
+
+    def averages(self):
+        return {
+            name: sum(times) / len(times)
+            for name, times in self.phase_times.items() if times
+        }
+
+    def export_chrome_trace(self, path):
+        events = [
+            {
+                "name": name,
+                "cat": "frame" if name == "frame" else "phase",
+                "ph": "X",
+                "ts": (start - self.origin) * 1e6,
+                "dur": duration * 1e6,
+                "pid": 1,
+                "tid": 1,
+            }
+            for name, start, duration in self.trace_events
+        ]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def export_csv(self, path):
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame", "frame_ms"] + [name + "_ms" for name in self.phase_names])
+            for frame_number, frame_time, phases in self.frame_rows:
+                writer.writerow(
+                    [frame_number, f"{frame_time * 1000:.4f}"] +
+                    [f"{phases.get(name, 0.0) * 1000:.4f}" for name in self.phase_names]
+                )
+
+    def draw(self, screen):
+        if not self.show_overlay or not self.frame_times:
+            return
+        if self.font is None:
+            self.font = load_font(None, 18)
+            self.overlay = pygame.Surface((320, 100 + 16 * 24), pygame.SRCALPHA)
+
+        overlay = self.overlay
+        overlay.fill((0, 0, 0, 170))
+
+        # Rolling frame time graph, scaled so the 60 FPS budget sits half way up.
+        graph_height = 80
+        budget = 1 / 60
+        bar_width = max(1, 320 // self.history)
+        for i, frame_time in enumerate(self.frame_times):
+            height = min(graph_height, int(frame_time / budget * graph_height / 2))
+            color = (100, 255, 30) if frame_time <= budget else (255, 80, 80)
+            pygame.draw.rect(overlay, color,
+                             (i * bar_width, graph_height - height, bar_width, height))
+        pygame.draw.line(overlay, (255, 255, 255),
+                         (0, graph_height // 2), (320, graph_height // 2))
+
+        latest = self.frame_times[-1] * 1000
+        mean = sum(self.frame_times) / len(self.frame_times) * 1000
+        rows = [(f"frame {latest:.2f} ms", f"avg {mean:.2f} ms")]
+        averages = self.averages()
+        for name in self.phase_names[:22]:
+            rows.append((name, f"{averages.get(name, 0.0) * 1000:.3f} ms"))
+
+        y = graph_height + 8
+        for label, value in rows:
+            overlay.blit(self.font.render(label, True, (255, 255, 255)), (6, y))
+            value_surface = self.font.render(value, True, (255, 255, 255))
+            overlay.blit(value_surface, (314 - value_surface.get_width(), y))
+            y += 16
+
+        screen.blit(overlay, (SCREEN_WIDTH - 330, SCREEN_HEIGHT - overlay.get_height() - 10))
+
+
+NULL_PROFILER = FrameProfiler()
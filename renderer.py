@@ -0,0 +1,122 @@
+from collections import Counter
+
+import pygame
+
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT
+
+
+class DisplayList:
+    # Stands in for the screen while a frame is drawn. Blits and fills are
+    # recorded instead of drawn, so the frame can be compared with the last
+    # one and replayed into just the regions that changed.
+    def __init__(self):
+        self.items = []
+        self.rects = []
+
+    def blit(self, source, dest, area=None, special_flags=0):
+        if area is not None:
+            area = tuple(pygame.Rect(area))
+            width, height = area[2:]
+        else:
+            width, height = source.get_size()
+        rect = pygame.Rect(dest[0], dest[1], width, height)
+        self.items.append((source, tuple(rect), area, special_flags))
+        self.rects.append(rect)
+        return rect
+
+    def fill(self, color, rect=None, special_flags=0):
+        rect = pygame.Rect(rect) if rect is not None else pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT)
+        self.items.append((tuple(pygame.Color(color)), tuple(rect), None, special_flags))
+        self.rects.append(rect)
+        return rect
+
+    def replay(self, screen, region=None):
+        items = self.items
+        indices = range(len(items)) if region is None else region.collidelistall(self.rects)
+        for i in indices:
+            source, rect, area, special_flags = items[i]
+            if isinstance(source, pygame.Surface):
+                screen.blit(source, rect[:2], area, special_flags)
+            else:
+                screen.fill(source, rect, special_flags)
+
+
+def merge_rects(rects, bounds):
+    merged = []
+    for rect in rects:
+        rect = bounds.clip(rect)
+        if not rect.width or not rect.height:
+            continue
+        i = rect.collidelist(merged)
+        while i != -1:
+            rect.union_ip(merged.pop(i))
+            i = rect.collidelist(merged)
+        merged.append(rect)
+    return merged
+
+
+class DirtyRectRenderer:
+    def __init__(self, scroll_threshold=24, max_fraction=0.6):
+        self.scroll_threshold = scroll_threshold
+        self.max_fraction = max_fraction
+        self.bounds = pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT)
+        self.display_list = DisplayList()
+        self.previous = None
+        self.camera_position = None
+        self.background_state = None
+
+        self.fraction = 1.0
+        self.frames = 0
+        self.full_frames = 0
+        self.total_fraction = 0.0
+
+    def begin(self):
+        self.display_list = DisplayList()
+        return self.display_list
+
+    def render(self, screen, draw_background, camera, background_state, full=False):
+        # Draws the recorded frame onto the screen. Returns None when the whole
+        # screen was redrawn and needs a flip, otherwise the list of rects that
+        # changed since the last frame.
+        display_list = self.display_list
+        camera_position = (camera.render_x, camera.render_y)
+        if self.previous is None or background_state != self.background_state:
+            full = True
+        elif not full:
+            last_x, last_y = self.camera_position
+            scroll = abs(camera_position[0] - last_x) + abs(camera_position[1] - last_y)
+            full = scroll > self.scroll_threshold
+
+        dirty = None
+        if not full:
+            current = Counter(display_list.items)
+            previous = Counter(self.previous.items)
+            changed = (current - previous) + (previous - current)
+            dirty = merge_rects([pygame.Rect(item[1]) for item in changed], self.bounds)
+            area = sum(rect.width * rect.height for rect in dirty)
+            fraction = area / (SCREEN_WIDTH * SCREEN_HEIGHT)
+            full = fraction > self.max_fraction
+
+        if full:
+            draw_background()
+            display_list.replay(screen)
+            dirty = None
+            fraction = 1.0
+            self.full_frames += 1
+        else:
+            for rect in dirty:
+                screen.set_clip(rect)
+                draw_background()
+                display_list.replay(screen, rect)
+            screen.set_clip(None)
+
+        self.previous = display_list
+        self.camera_position = camera_position
+        self.background_state = background_state
+        self.fraction = fraction
+        self.frames += 1
+        self.total_fraction += fraction
+        return dirty
+
+    def average_fraction(self):
+        return self.total_fraction / self.frames if self.frames else 0.0
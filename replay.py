@@ -0,0 +1,243 @@
+import argparse
+import hashlib
+import json
+import struct
+import time
+
+import pygame
+
+from inputs import KeyState
+
+REPLAY_MAGIC = b"WFRP"
+REPLAY_VERSION = 1
+
+# Every key Player.handle_input reads. Each one is a bit in a frame's mask.
+GAME_KEYS = (pygame.K_LEFT, pygame.K_a, pygame.K_RIGHT, pygame.K_d,
+             pygame.K_SPACE, pygame.K_w, pygame.K_UP, pygame.K_x)
+EVENTS = ("start", "restart")
+
+HEADER = struct.Struct("<4sHHIII")
+KEY_RECORD = struct.Struct("<i")
+EVENT_RECORD = struct.Struct("<IB")
+RUN_RECORD = struct.Struct("<IH")
+
+
+class Replay:
+    # Inputs are stored per simulation step as a bitmask of GAME_KEYS, run
+    # length encoded, since held keys repeat for many steps. Start and restart
+    # events are stored with the step they happened before.
+    def __init__(self, keys=GAME_KEYS, runs=None, events=None, info=None):
+        self.keys = tuple(keys)
+        self.runs = runs if runs is not None else []
+        self.events = events if events is not None else []
+        self.info = info if info is not None else {}
+
+    @property
+    def steps(self):
+        return sum(count for count, mask in self.runs)
+
+    def append(self, mask):
+        runs = self.runs
+        if runs and runs[-1][1] == mask:
+            runs[-1][0] += 1
+        else:
+            runs.append([1, mask])
+
+    def to_bytes(self):
+        info = json.dumps(self.info).encode()
+        parts = [HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, len(self.keys),
+                             len(self.events), len(self.runs), len(info))]
+        parts.extend(KEY_RECORD.pack(key) for key in self.keys)
+        parts.extend(EVENT_RECORD.pack(step, kind) for step, kind in self.events)
+        parts.extend(RUN_RECORD.pack(count, mask) for count, mask in self.runs)
+        parts.append(info)
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, key_count, event_count, run_count, info_length = HEADER.unpack_from(data)
+        if magic != REPLAY_MAGIC:
+            raise ValueError("Not a Wizard Frog replay")
+        if version > REPLAY_VERSION:
+            raise ValueError(f"Unsupported replay version {version}")
+
+        offset = HEADER.size
+        tables = []
+        for record, count in ((KEY_RECORD, key_count), (EVENT_RECORD, event_count),
+                              (RUN_RECORD, run_count)):
+            end = offset + record.size * count
+            tables.append(list(record.iter_unpack(data[offset:end])))
+            offset = end
+        keys, events, runs = tables
+        info = json.loads(data[offset:offset + info_length])
+        return cls([key for key, in keys], [list(run) for run in runs], events, info)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+class InputRecorder:
+    def __init__(self, path, info=None, keys=GAME_KEYS):
+        self.path = path
+        self.replay = Replay(keys, info=dict(info or {}))
+        self.source = None
+        self.steps = 0
+
+    def get_pressed(self):
+        pressed = self.source.get_pressed()
+        mask = 0
+        for bit, key in enumerate(self.replay.keys):
+            if pressed[key]:
+                mask |= 1 << bit
+        self.replay.append(mask)
+        self.steps += 1
+        return pressed
+
+    def event(self, kind):
+        self.replay.events.append((self.steps, EVENTS.index(kind)))
+
+    def finish(self, game):
+        self.replay.info["steps"] = self.steps
+        self.replay.info["hash"] = state_hash(game)
+        self.replay.save(self.path)
+
+
+class ReplayInput:
+    def __init__(self, replay):
+        self.keys = replay.keys
+        self.runs = replay.runs
+        self.states = {}
+        self.run = 0
+        self.left = 0
+        self.state = None
+
+    def key_state(self, mask):
+        state = self.states.get(mask)
+        if state is None:
+            state = self.states[mask] = KeyState(
+                key for bit, key in enumerate(self.keys) if mask & (1 << bit)
+            )
+        return state
+
+    def get_pressed(self):
+        if self.left == 0:
+            if self.run == len(self.runs):
+                raise IndexError("Replay has no more input")
+            count, mask = self.runs[self.run]
+            self.run += 1
+            self.left = count
+            self.state = self.key_state(mask)
+        self.left -= 1
+        return self.state
+
+
+def state_hash(game):
+    # Covers everything gameplay depends on. Sleeping entities are hashed as
+    # they will be once fast-forwarded, so runs that slept different entities
+    # still compare equal. The game is left as it was: sleeping entities are
+    # put back afterwards and nothing is journaled. Syncing the vectorized
+    # movers only brings their attributes up to date with their arrays.
+    game.index.sync_movers()
+    last = game.scheduler.tick - 1
+
+    def current(entity, describe):
+        asleep = last - entity.last_tick
+        if asleep <= 0 or getattr(entity, "movers", None) is not None:
+            return describe(entity)
+        state = entity.save_state()
+        entity.fast_forward(asleep)
+        value = describe(entity)
+        entity.load_state(state)
+        return value
+
+    player = game.player
+    state = (
+        game.game_started, game.game_over, game.game_won,
+        tuple(player.rect), player.vel_x, player.vel_y, player.health, player.ammo,
+        player.score, player.player_dead, player.damage_cooldown, player.shoot_cooldown,
+        game.camera.offset_x, game.camera.offset_y,
+        [tuple(projectile.rect) for projectile in player.projectiles],
+        [current(platform, lambda platform: tuple(platform.rect))
+         for platform in game.platforms],
+        [current(enemy, lambda enemy: (tuple(enemy.rect), enemy.move_direction))
+         for enemy in game.enemies],
+        [current(saw, lambda saw: saw.current_frame) for saw in game.saws],
+        [tuple(item.rect) for item in game.heart_items],
+        [tuple(item.rect) for item in game.ammo_items],
+    )
+    return hashlib.sha256(repr(state).encode()).hexdigest()
+
+
+def play(game, replay):
+    # Steps the game through the replay as fast as possible. Events fire before
+    # the step they were recorded at, the same as in the live run.
+    game.input_source = ReplayInput(replay)
+    events = sorted(replay.events)
+    total = replay.steps
+    next_event = 0
+    step = 0
+    while True:
+        while next_event < len(events) and events[next_event][0] == step:
+            if EVENTS[events[next_event][1]] == "start":
+                game.game_started = True
+            else:
+                game.restart_game()
+            next_event += 1
+        if step == total or not game.game_started or game.game_over or game.game_won:
+            return step
+        game.update()
+        step += 1
+
+
+def main():
+    from game_loop import GameLoop
+    from level import create_level
+    from level_format import level_loader, load_records
+    from streaming import LevelStreamer
+
+    parser = argparse.ArgumentParser(description="Replay a recorded Wizard Frog session")
+    parser.add_argument("replay", help="replay file written by main.py --record")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="play the replay this many times and report the best time")
+    parser.add_argument("--scalar-movers", action="store_true",
+                        help="replay with per-object movers to check they match")
+    args = parser.parse_args()
+
+    replay = Replay.load(args.replay)
+    level = replay.info.get("level")
+    level_factory = level_loader(level) if level else create_level
+    level_stream = None
+    if level and replay.info.get("stream"):
+        level_stream = lambda: LevelStreamer(load_records(level))
+
+    best = None
+    for _ in range(args.repeat):
+        game = GameLoop(headless=True, level_factory=level_factory, level_stream=level_stream,
+                        vectorize_movers=False if args.scalar_movers else None)
+        start = time.perf_counter()
+        steps = play(game, replay)
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        best = elapsed if best is None else min(best, elapsed)
+
+    digest = state_hash(game)
+    print(f"{steps} steps in {best:.3f}s ({steps / best:.0f} steps/s, "
+          f"{steps / best / 60:.1f}x real time)")
+    expected = replay.info.get("hash")
+    if steps != replay.info.get("steps", steps):
+        raise SystemExit(f"Replay stopped after {steps} of {replay.info['steps']} steps")
+    if expected is None:
+        print(f"state {digest}")
+    elif digest != expected:
+        raise SystemExit(f"State hash mismatch: expected {expected}, got {digest}")
+    else:
+        print(f"state {digest} matches")
+
+
+if __name__ == "__main__":
+    main()
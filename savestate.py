@@ -0,0 +1,308 @@
+import struct
+import zlib
+
+from movers import np
+from scheduler import ActivityScheduler
+
+SAVE_MAGIC = b"WFSV"
+SAVE_VERSION = 1
+
+HEADER = struct.Struct("<4sHIB")
+COUNT = struct.Struct("<I")
+
+GAME_FIELDS = ("game_started", "game_over", "game_won", "flash_background_timer",
+               "warning_message_timer")
+CAMERA_FIELDS = ("offset_x", "offset_y", "prev_offset_x", "prev_offset_y",
+                 "render_x", "render_y", "alpha")
+FROG_FIELDS = ("angle", "remaining_rotation")
+PLAYER_FIELDS = ("x", "y", "prev_x", "prev_y", "vel_x", "vel_y", "on_ground", "health",
+                 "player_dead", "facing_right", "damage_cooldown", "invincible",
+                 "current_frame", "frame_counter", "shoot_cooldown", "ammo", "frog", "score",
+                 "shoot_anim_timer")
+ENGINES = (("platform_movers", 0), ("enemy_movers", 3))
+
+# Values are stored with their type, since the game mixes ints and floats in
+# the same fields (a counter reset to 0 after counting up in halves) and a
+# restored state should compare equal to the original.
+VALUE_CODES = {bool: "?", int: "q", float: "d"}
+value_structs = {}
+
+
+def value_struct(codes):
+    record = value_structs.get(codes)
+    if record is None:
+        record = value_structs[codes] = struct.Struct("<" + codes)
+    return record
+
+
+def pack_values(values):
+    codes = "".join(VALUE_CODES[type(value)] for value in values)
+    return bytes((len(codes),)) + codes.encode() + value_struct(codes).pack(*values)
+
+
+def unpack_values(data, offset):
+    length = data[offset]
+    offset += 1
+    record = value_struct(data[offset:offset + length].decode())
+    offset += length
+    return record.unpack_from(data, offset), offset + record.size
+
+
+def pack_indices(indices):
+    return COUNT.pack(len(indices)) + struct.pack(f"<{len(indices)}I", *indices)
+
+
+def unpack_indices(data, offset):
+    count, = COUNT.unpack_from(data, offset)
+    offset += COUNT.size
+    return struct.unpack_from(f"<{count}I", data, offset), offset + 4 * count
+
+
+def fresh_entry(grid, obj):
+    # The order obj was filed in when the level was built, which never changes.
+    journaled = grid.journal.get(id(obj))
+    filed = journaled[1] if journaled is not None else grid.entries[id(obj)]
+    return filed[0]
+
+
+class GameState:
+    # Everything a running game has changed since its level was built, so it
+    # can be cloned in memory or written to a save file. Entities are only
+    # captured if the journals of the world snapshot (see snapshot.py) say
+    # they were touched, which keeps a capture small and quick on any level.
+    def __init__(self, game, camera, frog, player, projectiles, level, entities,
+                 filings, movers):
+        self.game = game
+        self.camera = camera
+        self.frog = frog
+        self.player = player
+        self.projectiles = projectiles
+        self.level = level
+        self.entities = entities
+        self.filings = filings
+        self.movers = movers
+
+    @classmethod
+    def capture(cls, game):
+        if game.snapshot is None:
+            raise ValueError("Game states need a level that is not streamed and "
+                             "instant_restart enabled")
+        index = game.index
+        player = game.player
+        pool = player.projectiles
+        return cls(
+            tuple(getattr(game, name) for name in GAME_FIELDS) + (game.scheduler.tick,),
+            tuple(getattr(game.camera, name) for name in CAMERA_FIELDS),
+            tuple(getattr(game.frog_display, name) for name in FROG_FIELDS),
+            player.save_state(),
+            (pool.next_recycled,
+             [(projectile.x, projectile.y, projectile.prev_x, projectile.direction)
+              for projectile in pool]),
+            # Lists only ever lose entities, so one that kept its length needs
+            # no copy.
+            [list(entities) if len(entities) != len(fresh) else None
+             for entities, fresh in zip(game.level_lists(), game.snapshot.level)],
+            [(entity, entity.save_state()) for entity, _ in game.scheduler.touched.values()],
+            [[(obj, grid.entries.get(id(obj))) for obj, filed in grid.journal.values()]
+             for grid in index.grids()],
+            [getattr(index, name).save() for name, kind in ENGINES] if index.vectorized else None,
+        )
+
+    def apply(self, game):
+        # Goes back to the freshly built world first, so only what this state
+        # changed has to be applied. The spatial hashes go straight to this
+        # state's filing.
+        game.snapshot.restore(game, self.filings)
+        scheduler = game.scheduler = ActivityScheduler()
+        scheduler.track()
+        for entity, state in self.entities:
+            scheduler.touch(entity)
+            entity.load_state(state)
+        for entities, saved in zip(game.level_lists(), self.level):
+            if saved is not None:
+                entities[:] = saved
+        index = game.index
+        if self.movers is not None:
+            for (name, kind), state in zip(ENGINES, self.movers):
+                getattr(index, name).load(state)
+            index.sync_movers()
+
+        player = game.player
+        player.load_state(self.player)
+        next_recycled, projectiles = self.projectiles
+        for x, y, prev_x, direction in projectiles:
+            player.projectiles.spawn(x, y, direction).prev_x = prev_x
+        player.projectiles.next_recycled = next_recycled
+
+        *flags, scheduler.tick = self.game
+        for name, value in zip(GAME_FIELDS, flags):
+            setattr(game, name, value)
+        for name, value in zip(CAMERA_FIELDS, self.camera):
+            setattr(game.camera, name, value)
+        for name, value in zip(FROG_FIELDS, self.frog):
+            setattr(game.frog_display, name, value)
+        game.presented_frame = None
+
+    def to_bytes(self, game):
+        # Entities are written as their position in the freshly built level,
+        # so a save file can only be loaded into a game built from the same
+        # level. The level's checksum is stored to catch that.
+        snapshot = game.snapshot
+        positions = snapshot.positions()
+        player = self.player
+        platform = player["on_moving_platform"]
+        animation = tuple(player["animations"]).index(player["current_animation"])
+        vectorized = self.movers is not None
+
+        parts = [pack_values(self.game), pack_values(self.camera), pack_values(self.frog),
+                 pack_values(tuple(player[name] for name in PLAYER_FIELDS) + (
+                     player["rect"].x, player["rect"].y, animation,
+                     positions[id(platform)][1] if platform is not None else -1,
+                 ))]
+
+        next_recycled, projectiles = self.projectiles
+        parts.append(pack_values((next_recycled, len(projectiles))))
+        parts.extend(pack_values(projectile) for projectile in projectiles)
+
+        for saved, fresh in zip(self.level, snapshot.level):
+            removed = []
+            if saved is not None:
+                # The entities left keep their order, so only the removed
+                # ones are written.
+                present = {id(entity) for entity in saved}
+                removed = [i for i, entity in enumerate(fresh) if id(entity) not in present]
+            parts.append(pack_indices(removed))
+
+        parts.append(pack_values((len(self.entities),)))
+        for entity, state in self.entities:
+            parts.append(pack_values(positions[id(entity)]))
+            parts.append(pack_values(state))
+
+        for filings in self.filings:
+            parts.append(pack_values((len(filings),)))
+            for obj, filed in filings:
+                span = filed[1] if filed is not None else ()
+                parts.append(pack_values((positions[id(obj)][1],) + span))
+
+        if vectorized:
+            for (name, kind), (count, tick, arrays, unbound, moved) in zip(ENGINES, self.movers):
+                parts.append(pack_values((count, tick, len(unbound), len(moved))))
+                parts.extend(arrays[array].tobytes() for array in getattr(game.index, name).ARRAYS)
+                parts.extend(pack_values((positions[id(entity)][1],)) for entity in unbound)
+                parts.extend(pack_values((positions[id(entity)][1], slot))
+                             for entity, slot in moved)
+        # The mover arrays are most of a save and compress well.
+        return (HEADER.pack(SAVE_MAGIC, SAVE_VERSION, snapshot.checksum(), vectorized) +
+                zlib.compress(b"".join(parts)))
+
+    @classmethod
+    def from_bytes(cls, game, data):
+        snapshot = game.snapshot
+        if snapshot is None:
+            raise ValueError("Game states need a level that is not streamed and "
+                             "instant_restart enabled")
+        if len(data) < HEADER.size:
+            raise ValueError("Not a Wizard Frog save file")
+        magic, version, checksum, vectorized = HEADER.unpack_from(data)
+        if magic != SAVE_MAGIC:
+            raise ValueError("Not a Wizard Frog save file")
+        if version > SAVE_VERSION:
+            raise ValueError(f"Unsupported save version {version}")
+        if checksum != snapshot.checksum():
+            raise ValueError("Save file is for a different level")
+        if bool(vectorized) != game.index.vectorized:
+            raise ValueError("Save file was written with vectorized movers "
+                             f"{'on' if vectorized else 'off'}")
+        try:
+            data = zlib.decompress(data[HEADER.size:])
+        except zlib.error as error:
+            raise ValueError(f"Corrupt save file: {error}")
+        try:
+            return cls.unpack(game, data, vectorized)
+        except (struct.error, IndexError, TypeError, UnicodeDecodeError) as error:
+            raise ValueError(f"Corrupt save file: {error}")
+
+    @classmethod
+    def unpack(cls, game, data, vectorized):
+        snapshot = game.snapshot
+        level = snapshot.level
+        offset = 0
+
+        def read():
+            nonlocal offset
+            values, offset = unpack_values(data, offset)
+            return values
+
+        game_fields, camera, frog = read(), read(), read()
+        values = read()
+        fields = len(PLAYER_FIELDS)
+        x, y, animation, platform = values[fields:]
+        # Starts from the fresh player's attributes, which include its frames
+        # and sounds, and replaces what the file stores.
+        player = dict(snapshot.player)
+        player.update(zip(PLAYER_FIELDS, values[:fields]))
+        player["rect"] = rect = player["rect"].copy()
+        rect.topleft = (x, y)
+        player["current_animation"] = tuple(player["animations"])[animation]
+        player["on_moving_platform"] = level[0][platform] if platform >= 0 else None
+
+        next_recycled, count = read()
+        projectiles = (next_recycled, [read() for _ in range(count)])
+
+        saved_level = []
+        for fresh in level:
+            indices, offset = unpack_indices(data, offset)
+            removed = set(indices)
+            saved_level.append([entity for i, entity in enumerate(fresh) if i not in removed]
+                               if removed else None)
+
+        count, = read()
+        entities = []
+        for _ in range(count):
+            kind, i = read()
+            entities.append((level[kind][i], read()))
+
+        filings = []
+        for kind, grid in enumerate(game.index.grids()):
+            count, = read()
+            grid_filings = []
+            for _ in range(count):
+                i, *span = read()
+                obj = level[kind][i]
+                filed = (fresh_entry(grid, obj), tuple(span)) if span else None
+                grid_filings.append((obj, filed))
+            filings.append(grid_filings)
+
+        movers = None
+        if vectorized:
+            movers = []
+            for name, kind in ENGINES:
+                engine = getattr(game.index, name)
+                count, tick, unbound_count, moved_count = read()
+                arrays = {}
+                for array, dtype in engine.ARRAYS.items():
+                    values = np.frombuffer(data, dtype, count, offset).copy()
+                    arrays[array] = values
+                    offset += values.nbytes
+                unbound = [level[kind][read()[0]] for _ in range(unbound_count)]
+                moved = []
+                for _ in range(moved_count):
+                    i, slot = read()
+                    moved.append((level[kind][i], slot))
+                movers.append((count, tick, arrays, unbound, moved))
+
+        return cls(game_fields, camera, frog, player, projectiles, saved_level, entities,
+                   filings, movers)
+
+
+def save_game(game, path):
+    data = GameState.capture(game).to_bytes(game)
+    with open(path, "wb") as f:
+        f.write(data)
+    return len(data)
+
+
+def load_game(game, path):
+    with open(path, "rb") as f:
+        data = f.read()
+    GameState.from_bytes(game, data).apply(game)
@@ -0,0 +1,72 @@
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT
+
+
+class ActivityScheduler:
+    def __init__(self, wake_margin_x=SCREEN_WIDTH * 2, wake_margin_y=SCREEN_HEIGHT):
+        self.wake_margin_x = wake_margin_x
+        self.wake_margin_y = wake_margin_y
+        self.tick = 0
+        self.updated = 0
+        self.woken = 0
+        # While a world snapshot is kept (see snapshot.py), the state each
+        # entity had before it was first changed, keyed by id.
+        self.touched = None
+
+    def track(self):
+        self.touched = {}
+
+    def touch(self, entity):
+        touched = self.touched
+        if touched is not None and id(entity) not in touched:
+            touched[id(entity)] = (entity, entity.save_state())
+
+    def wake_region(self, camera, focus, reach=0):
+        # The camera trails the player, so the focus rect is folded in to keep
+        # a respawned player's surroundings awake. Sleeping movers are still
+        # filed under the cell they fell asleep in, so the region also reaches
+        # as far as any of them could have moved.
+        return camera.visible_rect().union(focus).inflate(
+            (self.wake_margin_x + reach) * 2, (self.wake_margin_y + reach) * 2
+        )
+
+    def projectile_regions(self, projectiles, reach=0):
+        # Projectiles are only culled horizontally, so they can reach enemies
+        # far outside the wake region. Keep those enemies awake as well.
+        return [
+            projectile.rect.inflate((reach + projectile.speed) * 2, reach * 2)
+            for projectile in projectiles
+        ]
+
+    def update(self, entities):
+        tick = self.tick
+        woken = 0
+        for entity in entities:
+            if entity.last_tick < 0:
+                self.touch(entity)
+            asleep = tick - entity.last_tick - 1
+            if asleep > 0:
+                entity.fast_forward(asleep)
+                woken += 1
+            entity.update()
+            entity.last_tick = tick
+        self.updated += len(entities)
+        self.woken += woken
+
+    def catch_up(self, entities):
+        # Fast-forwards sleeping entities to the last completed step without
+        # stepping the ones that are already there, e.g. before the whole level
+        # is inspected.
+        last = self.tick - 1
+        for entity in entities:
+            asleep = last - entity.last_tick
+            if asleep > 0:
+                self.touch(entity)
+                entity.fast_forward(asleep)
+                entity.last_tick = last
+
+    def begin_step(self):
+        self.updated = 0
+        self.woken = 0
+
+    def end_step(self):
+        self.tick += 1
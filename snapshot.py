@@ -0,0 +1,46 @@
+import zlib
+
+from level_format import level_to_records, records_to_binary
+
+
+class WorldSnapshot:
+    # The freshly built world, kept so a restart can put it back in place
+    # instead of building the level and the player again. Only what the game
+    # changes is saved: the level lists (items and enemies get removed), the
+    # vectorized movers' arrays and the player. Everything else is journaled
+    # as it changes (ActivityScheduler.touch, SpatialHash.journal and
+    # MoverEngine.journal), so a restore only visits the entities that were
+    # touched and costs about the same however big the level is.
+    def __init__(self, game):
+        self.level = [list(entities) for entities in game.level_lists()]
+        self.movers = game.index.snapshot()
+        self.player = game.player.save_state()
+        self.level_checksum = None
+        self.level_positions = None
+
+    def restore(self, game, filings=None):
+        for entity, state in game.scheduler.touched.values():
+            entity.load_state(state)
+        for entities, saved in zip(game.level_lists(), self.level):
+            # Nothing is ever added to a level that is not streamed, so a list
+            # that kept its length has not changed.
+            if len(entities) != len(saved):
+                entities[:] = saved
+        game.index.restore(self.movers, filings)
+        game.player.load_state(self.player)
+
+    def checksum(self):
+        if self.level_checksum is None:
+            records = level_to_records(self.level)
+            self.level_checksum = zlib.crc32(records_to_binary(records))
+        return self.level_checksum
+
+    def positions(self):
+        # Where each entity of the freshly built level sits, as (list, index).
+        if self.level_positions is None:
+            self.level_positions = {
+                id(entity): (kind, i)
+                for kind, entities in enumerate(self.level)
+                for i, entity in enumerate(entities)
+            }
+        return self.level_positions
@@ -0,0 +1,139 @@
+import pygame
+
+from assets import registry
+
+# name: (path, volume, max_voices, priority, min_interval_ms). A higher
+# priority can take a channel from a lower one when every channel is busy.
+SOUNDS = {
+    "damage": ("Assets/damage.wav", 0.2, 2, 3, 0),
+    "collection": ("Assets/collection.wav", 1.5, 2, 2, 40),
+    "shoot": ("Assets/shoot.wav", 1.5, 3, 1, 60),
+}
+# Fewer channels than the voice limits add up to, so a busy scene has to
+# choose between sounds by priority.
+SOUND_CHANNELS = 6
+
+
+class SoundSpec:
+    def __init__(self, name, sound, max_voices, priority, min_interval):
+        self.name = name
+        self.sound = sound
+        self.max_voices = max_voices
+        self.priority = priority
+        self.min_interval = min_interval
+        self.last_played = None
+        # Channels this sound is playing on, oldest first.
+        self.voices = []
+
+
+class SoundBank:
+    # Every sound effect goes through one bank. Sounds are decoded once per
+    # process, so building a new Player (every restart) does no audio I/O, and
+    # the bank owns a fixed set of channels so the mixer's load stays bounded
+    # however busy the game gets.
+    def __init__(self, sounds=SOUNDS, channels=SOUND_CHANNELS, clock=pygame.time.get_ticks):
+        self.definitions = sounds
+        self.channel_count = channels
+        self.clock = clock
+        self.specs = {}
+        self.channels = []
+        self.owners = {}
+        self.played = 0
+        self.stolen = 0
+        self.throttled = 0
+        self.dropped = 0
+
+    def open(self):
+        # Called after pygame.mixer.init. Channels from an earlier mixer are
+        # no longer valid, so they are fetched again.
+        pygame.mixer.set_num_channels(self.channel_count)
+        self.channels = [pygame.mixer.Channel(i) for i in range(self.channel_count)]
+        self.owners.clear()
+        for spec in self.specs.values():
+            spec.voices.clear()
+
+    def load(self):
+        for name, (path, volume, max_voices, priority, min_interval) in self.definitions.items():
+            spec = self.specs.get(name)
+            sound = registry.sound(path)
+            if spec is None or spec.sound is not sound:
+                sound.set_volume(volume)
+                self.specs[name] = SoundSpec(name, sound, max_voices, priority, min_interval)
+        return self
+
+    def busy(self, index):
+        return self.owners.get(index) is not None and self.channels[index].get_busy()
+
+    def release(self, index):
+        spec = self.owners.pop(index, None)
+        if spec is not None and index in spec.voices:
+            spec.voices.remove(index)
+
+    def free_channel(self):
+        for index in range(len(self.channels)):
+            if not self.busy(index):
+                self.release(index)
+                return index
+        return None
+
+    def steal(self, priority):
+        # Takes the oldest voice of the lowest priority sound playing, as long
+        # as it is not more important than the sound that wants the channel.
+        victim = None
+        for spec in set(self.owners.values()):
+            if spec.voices and spec.priority <= priority:
+                if victim is None or spec.priority < victim.priority:
+                    victim = spec
+        if victim is None:
+            return None
+        index = victim.voices[0]
+        self.release(index)
+        self.stolen += 1
+        return index
+
+    def play(self, name):
+        spec = self.specs[name]
+        if not self.channels:
+            return None
+        now = self.clock()
+        if spec.last_played is not None and now - spec.last_played < spec.min_interval:
+            self.throttled += 1
+            return None
+
+        spec.voices = [index for index in spec.voices if self.busy(index)]
+        if len(spec.voices) >= spec.max_voices:
+            # At its limit a sound restarts its own oldest voice.
+            index = spec.voices[0]
+            self.release(index)
+        else:
+            index = self.free_channel()
+            if index is None:
+                index = self.steal(spec.priority)
+            if index is None:
+                self.dropped += 1
+                return None
+
+        channel = self.channels[index]
+        channel.play(spec.sound)
+        self.owners[index] = spec
+        spec.voices.append(index)
+        spec.last_played = now
+        self.played += 1
+        return channel
+
+    def stop(self):
+        for index in list(self.owners):
+            self.channels[index].stop()
+            self.release(index)
+
+    def stats(self):
+        return {
+            "played": self.played,
+            "stolen": self.stolen,
+            "throttled": self.throttled,
+            "dropped": self.dropped,
+            "voices": {spec.name: len(spec.voices) for spec in self.specs.values()},
+        }
+
+
+sound_bank = SoundBank()
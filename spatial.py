@@ -0,0 +1,262 @@
+from movers import MoverEngine, np
+
+
+class SpatialHash:
+    def __init__(self, cell_size=256):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.entries = {}
+        self.next_order = 0
+        # While a world snapshot is kept, where each object moved or removed
+        # since then was filed, so rewind() only has to re-file those.
+        self.journal = None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, obj):
+        return id(obj) in self.entries
+
+    def span(self, rect):
+        size = self.cell_size
+        return (rect.left // size, rect.top // size,
+                (rect.right - 1) // size, (rect.bottom - 1) // size)
+
+    def insert(self, obj):
+        span = self.span(obj.rect)
+        entry = (self.next_order, obj)
+        self.next_order += 1
+        if self.journal is not None and id(obj) not in self.journal:
+            self.journal[id(obj)] = (obj, None)
+        self.entries[id(obj)] = (entry, span)
+        self.add_to_cells(entry, span)
+
+    def remove(self, obj):
+        filed = self.entries.pop(id(obj))
+        if self.journal is not None and id(obj) not in self.journal:
+            self.journal[id(obj)] = (obj, filed)
+        self.remove_from_cells(*filed)
+
+    def move(self, obj):
+        filed = self.entries[id(obj)]
+        entry, span = filed
+        new_span = self.span(obj.rect)
+        if new_span == span:
+            return
+        if self.journal is not None and id(obj) not in self.journal:
+            self.journal[id(obj)] = (obj, filed)
+        self.remove_from_cells(entry, span)
+        self.add_to_cells(entry, new_span)
+        self.entries[id(obj)] = (entry, new_span)
+
+    def track(self):
+        self.journal = {}
+
+    def rewind(self, filings=None):
+        # Puts every journaled object back where it was filed when tracking
+        # started, keeping its original insertion order. Objects in filings
+        # (a saved state's (obj, filed) pairs, see savestate.py) are filed as
+        # given instead, or removed if filed is None, and stay journaled.
+        entries = self.entries
+        journal = self.journal
+        targets = {}
+        for obj, filed in filings or ():
+            targets[id(obj)] = filed
+            if id(obj) not in journal:
+                journal[id(obj)] = (obj, entries.get(id(obj)))
+        for key, (obj, original) in journal.items():
+            filed = targets[key] if key in targets else original
+            current = entries.get(key)
+            if current == filed:
+                continue
+            if current is not None:
+                del entries[key]
+                self.remove_from_cells(*current)
+            if filed is not None:
+                entries[key] = filed
+                self.add_to_cells(*filed)
+        self.journal = {key: journal[key] for key in targets}
+
+    def add_to_cells(self, entry, span):
+        cells = self.cells
+        x0, y0, x1, y1 = span
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                cell = cells.get((cx, cy))
+                if cell is None:
+                    cells[(cx, cy)] = [entry]
+                else:
+                    cell.append(entry)
+
+    def remove_from_cells(self, entry, span):
+        cells = self.cells
+        x0, y0, x1, y1 = span
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                cell = cells[(cx, cy)]
+                cell.remove(entry)
+                if not cell:
+                    del cells[(cx, cy)]
+
+    def query(self, rect):
+        return self.query_all((rect,))
+
+    def query_all(self, rects):
+        # Candidates come back in insertion order so callers see entities in
+        # the same order as the level lists they were built from.
+        cells = self.cells
+        found = {}
+        for rect in rects:
+            x0, y0, x1, y1 = self.span(rect)
+            for cx in range(x0, x1 + 1):
+                for cy in range(y0, y1 + 1):
+                    cell = cells.get((cx, cy))
+                    if cell:
+                        for order, obj in cell:
+                            found[order] = obj
+        if len(found) < 2:
+            return list(found.values())
+        return [found[order] for order in sorted(found)]
+
+    def collide_all(self, rects):
+        # For each rect, the entities overlapping it in insertion order. Rects
+        # are grouped by cell so each cell's entities are tested against all
+        # of them with one collidelistall call per rect.
+        groups = {}
+        for i, rect in enumerate(rects):
+            x0, y0, x1, y1 = self.span(rect)
+            for cx in range(x0, x1 + 1):
+                for cy in range(y0, y1 + 1):
+                    group = groups.get((cx, cy))
+                    if group is None:
+                        groups[(cx, cy)] = [i]
+                    else:
+                        group.append(i)
+
+        cells = self.cells
+        found = {}
+        for key, group in groups.items():
+            cell = cells.get(key)
+            if not cell:
+                continue
+            cell_rects = [obj.rect for order, obj in cell]
+            for i in group:
+                colliding = rects[i].collidelistall(cell_rects)
+                if colliding:
+                    matches = found.setdefault(i, {})
+                    for j in colliding:
+                        order, obj = cell[j]
+                        matches[order] = obj
+        return {
+            i: [matches[order] for order in sorted(matches)]
+            for i, matches in found.items()
+        }
+
+
+class LevelIndex:
+    def __init__(self, platforms, saws, heart_items, enemies, ammo_items,
+                 cell_size=256, vectorize=None):
+        self.platforms = SpatialHash(cell_size)
+        self.saws = SpatialHash(cell_size)
+        self.heart_items = SpatialHash(cell_size)
+        self.enemies = SpatialHash(cell_size)
+        self.ammo_items = SpatialHash(cell_size)
+        self.moving_platforms = {}
+        self.max_reach = 0
+
+        # With NumPy available, moving platforms and enemies are stepped as
+        # arrays by MoverEngine instead of one update() call at a time.
+        if vectorize is None:
+            vectorize = np is not None
+        self.vectorized = vectorize
+        self.platform_movers = MoverEngine(cell_size) if vectorize else None
+        self.enemy_movers = MoverEngine(cell_size) if vectorize else None
+
+        self.add_entities((platforms, saws, heart_items, enemies, ammo_items))
+
+    def grids(self):
+        return self.platforms, self.saws, self.heart_items, self.enemies, self.ammo_items
+
+    def add_entities(self, level):
+        for platform in level[0]:
+            if platform.type in ("moving_vertical", "moving_horizontal"):
+                self.moving_platforms[id(platform)] = platform
+                self.max_reach = max(self.max_reach,
+                                     (platform.move_range + platform.move_speed) * 2)
+                if self.vectorized:
+                    self.platform_movers.add(platform,
+                                             platform.type == "moving_horizontal")
+        for enemy in level[3]:
+            self.max_reach = max(self.max_reach,
+                                 (enemy.move_range + enemy.move_speed) * 2)
+            if self.vectorized:
+                self.enemy_movers.add(enemy)
+
+        for grid, entities in zip(self.grids(), level):
+            for entity in entities:
+                grid.insert(entity)
+
+    def remove_entities(self, level):
+        for grid, entities in zip(self.grids(), level):
+            for entity in entities:
+                if entity in grid:
+                    grid.remove(entity)
+        for platform in level[0]:
+            self.moving_platforms.pop(id(platform), None)
+        for entities in (level[0], level[3]):
+            for entity in entities:
+                if entity.movers is not None:
+                    entity.movers.remove(entity)
+
+    def snapshot(self):
+        for grid in self.grids():
+            grid.track()
+        if not self.vectorized:
+            return None
+        return self.platform_movers.snapshot(), self.enemy_movers.snapshot()
+
+    def restore(self, movers, filings=None):
+        for i, grid in enumerate(self.grids()):
+            grid.rewind(filings[i] if filings else None)
+        if movers is not None:
+            self.platform_movers.restore(movers[0])
+            self.enemy_movers.restore(movers[1])
+
+    def step_movers(self):
+        self.platform_movers.step()
+        self.enemy_movers.step()
+
+    def rehash_movers(self, region, enemy_region):
+        # Movers that changed cells are synced so they are refiled by their
+        # current rect.
+        for movers, grid, area in ((self.platform_movers, self.platforms, region),
+                                   (self.enemy_movers, self.enemies, enemy_region)):
+            moved = movers.moved_cells(movers.slots_in(area))
+            if len(moved):
+                movers.sync(moved)
+                entities = movers.entities
+                for i in moved.tolist():
+                    grid.move(entities[i])
+
+    def sync_movers(self, regions=None, enemy_regions=None):
+        # Brings the attributes of the bound movers overlapping the regions up
+        # to date, or of all of them, e.g. before the whole level is inspected.
+        # Movers only oscillate, so one whose attributes are stale is never
+        # more than max_reach away from where they put it. Syncing everything
+        # within max_reach of an area keeps its queries exact.
+        if not self.vectorized:
+            return
+        if regions is None:
+            self.platform_movers.sync()
+            self.enemy_movers.sync()
+            return
+        self.platform_movers.sync(self.platform_movers.slots_in(*regions))
+        self.enemy_movers.sync(self.enemy_movers.slots_in(*enemy_regions))
+
+    def update_movers(self, platforms, enemies):
+        moving_platforms = self.moving_platforms
+        for platform in platforms:
+            if id(platform) in moving_platforms:
+                self.platforms.move(platform)
+        for enemy in enemies:
+            self.enemies.move(enemy)
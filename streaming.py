@@ -0,0 +1,137 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from constants import SCREEN_HEIGHT
+from level_format import (binary_to_records, level_to_records, records_to_binary,
+                          records_to_level)
+
+RECORD_KEYS = ("platforms", "saws", "heart_items", "enemies", "ammo_items")
+
+
+def split_records(records, chunk_height):
+    chunks = {}
+    for key in RECORD_KEYS:
+        for row in records[key]:
+            # Every record type stores the entity's y position second.
+            chunk_row = row[1] // chunk_height
+            chunk = chunks.get(chunk_row)
+            if chunk is None:
+                chunk = chunks[chunk_row] = {name: [] for name in RECORD_KEYS}
+            chunk[key].append(row)
+    return {chunk_row: records_to_binary(chunk) for chunk_row, chunk in chunks.items()}
+
+
+def build_chunk(packed):
+    return records_to_level(binary_to_records(packed))
+
+
+def unpack_chunk(packed):
+    # Only the records are decoded off the main thread. Building entities
+    # loads and converts their images, which has to happen on the main thread.
+    return binary_to_records(packed)
+
+
+class LevelStreamer:
+    def __init__(self, records, chunk_height=1024, active_radius=1, loaded_radius=2,
+                 prefetch=True):
+        self.chunk_height = chunk_height
+        self.active_radius = active_radius
+        self.loaded_radius = max(loaded_radius, active_radius)
+
+        # Chunks that are not loaded are kept as packed binary records, which
+        # are a small fraction of the size of the entities they describe.
+        self.packed = split_records(records, chunk_height)
+        self.loaded = {}
+        self.active = set()
+        self.pending = {}
+        self.executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+
+        self.loads = 0
+        self.prefetched = 0
+        self.evictions = 0
+
+    def center_row(self, camera):
+        return (camera.offset_y + SCREEN_HEIGHT // 2) // self.chunk_height
+
+    def load(self, row):
+        future = self.pending.pop(row, None)
+        if future is not None:
+            level = records_to_level(future.result())
+            self.prefetched += 1
+        else:
+            level = build_chunk(self.packed[row])
+        self.loaded[row] = level
+        self.loads += 1
+        return level
+
+    def build_prefetched(self):
+        # Builds one chunk whose records are ready per update, so a chunk
+        # coming into range is usually built already.
+        for row, future in self.pending.items():
+            if future.done():
+                self.load(row)
+                return
+
+    def activate(self, game, row):
+        level = self.loaded.get(row)
+        if level is None:
+            level = self.load(row)
+        game.add_entities(level)
+        self.active.add(row)
+
+    def deactivate(self, game, row):
+        # Items picked up and enemies defeated while the chunk was active are
+        # no longer in the index, so they are dropped from the chunk for good.
+        level = tuple(
+            [entity for entity in entities if entity in grid]
+            for grid, entities in zip(game.index.grids(), self.loaded[row])
+        )
+        game.remove_entities(level)
+        self.loaded[row] = level
+        self.active.discard(row)
+
+    def evict(self, row):
+        self.packed[row] = records_to_binary(level_to_records(self.loaded.pop(row)))
+        self.evictions += 1
+
+    def prefetch(self, center):
+        if self.executor is None:
+            return
+        for distance in range(self.active_radius + 1, self.loaded_radius + 1):
+            for row in (center + distance, center - distance):
+                if row in self.packed and row not in self.loaded and row not in self.pending:
+                    self.pending[row] = self.executor.submit(unpack_chunk, self.packed[row])
+
+    def update(self, game):
+        center = self.center_row(game.camera)
+
+        for row in list(self.active):
+            if abs(row - center) > self.active_radius:
+                self.deactivate(game, row)
+
+        for row in range(center - self.active_radius, center + self.active_radius + 1):
+            if row in self.packed and row not in self.active:
+                self.activate(game, row)
+
+        for row in list(self.loaded):
+            if abs(row - center) > self.loaded_radius:
+                self.evict(row)
+        for row in list(self.pending):
+            if abs(row - center) > self.loaded_radius:
+                self.pending.pop(row).cancel()
+
+        self.build_prefetched()
+        self.prefetch(center)
+
+    def stats(self):
+        return {
+            "chunks": len(self.packed),
+            "loaded": len(self.loaded),
+            "active": len(self.active),
+            "loads": self.loads,
+            "prefetched": self.prefetched,
+            "evictions": self.evictions,
+        }
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,63 @@
+from sounds import SOUNDS, SOUND_CHANNELS, SoundBank, SoundSpec
+
+
+class FakeChannel:
+    def __init__(self):
+        self.sound = None
+
+    def play(self, sound):
+        self.sound = sound
+
+    def stop(self):
+        self.sound = None
+
+    def get_busy(self):
+        return self.sound is not None
+
+
+def make_bank():
+    # The real sound table and channel count, with channels that stay busy
+    # until stopped, so no mixer or audio files are needed.
+    now = [0]
+
+    def clock():
+        now[0] += 1000
+        return now[0]
+
+    bank = SoundBank(SOUNDS, SOUND_CHANNELS, clock)
+    bank.channels = [FakeChannel() for _ in range(SOUND_CHANNELS)]
+    for name, (path, volume, max_voices, priority, min_interval) in SOUNDS.items():
+        bank.specs[name] = SoundSpec(name, name, max_voices, priority, min_interval)
+    return bank
+
+
+def test_voice_limits_exceed_channels():
+    assert sum(voices for path, volume, voices, priority, interval in SOUNDS.values()) > \
+        SOUND_CHANNELS
+
+
+def test_higher_priority_steals_oldest_low_priority_voice():
+    bank = make_bank()
+    for name in ("shoot", "shoot", "shoot", "collection", "collection", "damage"):
+        assert bank.play(name) is not None
+    oldest_shot = bank.specs["shoot"].voices[0]
+
+    channel = bank.play("damage")
+    assert channel is bank.channels[oldest_shot]
+    assert channel.sound == "damage"
+    assert bank.stolen == 1
+    assert bank.specs["shoot"].voices == [1, 2]
+    assert len(bank.specs["damage"].voices) == 2
+
+
+def test_lower_priority_is_dropped_when_channels_are_busy():
+    bank = make_bank()
+    for name in ("damage", "damage", "collection", "collection"):
+        bank.play(name)
+    bank.specs["damage"].max_voices = bank.specs["collection"].max_voices = 3
+    bank.play("damage")
+    bank.play("collection")
+
+    assert bank.play("shoot") is None
+    assert bank.dropped == 1
+    assert bank.stolen == 0
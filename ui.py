@@ -1,6 +1,7 @@
 import pygame
-from constants import SCREEN_WIDTH
-from functions import load_image
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT
+from functions import load_image, load_font, load_rotated
+from renderer import DisplayList
 
 class HealthBar:
     def __init__(self, heart_path="Assets/Heart.png"):
@@ -8,6 +9,8 @@ class HealthBar:
         self.heart_spacing = 10
         self.max_hearts = 10
         self.heart_image = load_image(heart_path, self.heart_size, self.heart_size)
+        self.grayed_heart = self.heart_image.copy()
+        self.grayed_heart.set_alpha(50)
 
     def draw(self, screen, health):
         hearts_to_show = max(0, health // 20)
@@ -20,23 +23,25 @@ class HealthBar:
             if i < hearts_to_show:
                 screen.blit(self.heart_image, (x_pos, start_y))
             else:
-                grayed_heart = self.heart_image.copy()
-                grayed_heart.set_alpha(50)
-                screen.blit(grayed_heart, (x_pos, start_y))
+                screen.blit(self.grayed_heart, (x_pos, start_y))
 
 class ScoreDisplay:
     def __init__(self):
-        self.font = pygame.font.Font("Assets/ShinyEyes-prr1.ttf", 48)
+        self.font = load_font("Assets/ShinyEyes-prr1.ttf", 48)
         self.color = (100, 255, 30)
+        self.score = None
+        self.score_surface = None
 
     def draw(self, screen, score):
-        score_surface = self.font.render(f"Score: {score}", True, self.color)
-        screen.blit(score_surface, (20, 70))
+        if score != self.score:
+            self.score = score
+            self.score_surface = self.font.render(f"Score: {score}", True, self.color)
+        screen.blit(self.score_surface, (20, 70))
 
 class FrogDisplay:
-    def __init__(self, image_path="Assets/Frog.png"):
+    def __init__(self, image_path="Assets/Frog.png", rotation_steps=72):
         self.frog_size = 80
-        self.original_image = load_image(image_path, self.frog_size, self.frog_size)
+        self.rotations = load_rotated(image_path, self.frog_size, self.frog_size, rotation_steps)
         self.angle = 0
         self.rotation_speed = 20
         self.remaining_rotation = 0
@@ -48,13 +53,21 @@ class FrogDisplay:
         self.angle = 0
         self.remaining_rotation = 0
 
-    def draw(self, screen):
+    def advance(self):
         if self.remaining_rotation > 0:
             rotate_amount = min(self.rotation_speed, self.remaining_rotation)
             self.angle = (self.angle - rotate_amount) % 360
             self.remaining_rotation -= rotate_amount
 
-        rotated_image = pygame.transform.rotate(self.original_image, self.angle)
+    def draw(self, screen):
+        self.advance()
+        self.render(screen)
+
+    def frame_index(self):
+        return self.rotations.index(self.angle)
+
+    def render(self, screen):
+        rotated_image = self.rotations.frame(self.angle)
         center_pos = (60, 180)
         new_rect = rotated_image.get_rect(center=center_pos)
         screen.blit(rotated_image, new_rect)
@@ -65,10 +78,11 @@ class AmmoDisplay:
         self.ammo_spacing = 5
         self.max_ammo = 30
         self.ammo_image = self.load_ammo(ammo_path)
+        self.grayed_ammo = self.ammo_image.copy()
+        self.grayed_ammo.set_alpha(50)
 
     def load_ammo(self, path):
-        image = pygame.image.load(path).convert_alpha()
-        return pygame.transform.scale(image, (self.ammo_size, self.ammo_size))
+        return load_image(path, self.ammo_size, self.ammo_size)
 
     def draw(self, screen, ammo):
         ammo_to_show = max(0, ammo)
@@ -88,6 +102,75 @@ class AmmoDisplay:
             if i < ammo_to_show:
                 screen.blit(self.ammo_image, (x_pos, y_pos))
             else:
-                grayed_ammo = self.ammo_image.copy()
-                grayed_ammo.set_alpha(50)
-                screen.blit(grayed_ammo, (x_pos, y_pos))
\ No newline at end of file
+                screen.blit(self.grayed_ammo, (x_pos, y_pos))
+
+class HudLayer:
+    def __init__(self, health_bar, ammo_display, frog_display, score_display, height=240):
+        self.health_bar = health_bar
+        self.ammo_display = ammo_display
+        self.frog_display = frog_display
+        self.score_display = score_display
+        self.size = (SCREEN_WIDTH, height)
+        self.surface = None
+        self.bounds = None
+        self.state = None
+        self.changed = False
+        self.rebuilds = 0
+
+    def draw(self, screen, health, ammo, score):
+        # The widgets are only redrawn into the cached layer when something
+        # they show has changed. Otherwise the HUD is a single blit.
+        state = (max(0, health // 20), max(0, ammo), score, self.frog_display.frame_index())
+        self.changed = state != self.state
+        if self.changed:
+            self.state = state
+            self.rebuild(health, ammo, score)
+        screen.blit(self.surface, self.bounds, self.bounds)
+
+    def rebuild(self, health, ammo, score):
+        # The widgets are recorded first so the layer's bounds come from their
+        # blit rects rather than a scan of the finished surface.
+        widgets = DisplayList()
+        self.health_bar.draw(widgets, health)
+        self.ammo_display.draw(widgets, ammo)
+        self.frog_display.render(widgets)
+        self.score_display.draw(widgets, score)
+        surface = pygame.Surface(self.size, pygame.SRCALPHA)
+        widgets.replay(surface)
+        # RLE lets the blit skip the transparent gap between the two corners,
+        # which makes it about ten times cheaper than a plain alpha blit. The
+        # layer is rebuilt on a fresh surface because drawing into an RLE
+        # encoded one does not blend the same way.
+        surface.set_alpha(255, pygame.RLEACCEL)
+        self.surface = surface
+        self.bounds = surface.get_rect().clip(widgets.rects[0].unionall(widgets.rects[1:]))
+        self.rebuilds += 1
+
+class OverlayScreen:
+    def __init__(self, lines, dim=None):
+        # Each line is (font, text, color, offset from the screen center).
+        # Text may hold format fields such as {score}; a line is only
+        # re-rendered when its formatted text changes.
+        self.dim = dim
+        self.lines = [[font, text, color, offset_y, None, None, None]
+                      for font, text, color, offset_y in lines]
+
+    def draw(self, screen, **values):
+        if self.dim is not None:
+            screen.blit(self.dim, (0, 0))
+        for line in self.lines:
+            font, template, color, offset_y, text, surface, rect = line
+            if values:
+                template = template.format(**values)
+            if template != text:
+                surface = font.render(template, True, color)
+                rect = surface.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + offset_y))
+                line[4:] = template, surface, rect
+            screen.blit(surface, rect)
+
+
+def dim_overlay(alpha=180):
+    overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    overlay.set_alpha(alpha)
+    overlay.fill((0, 0, 0))
+    return overlay